@@ -1,270 +1,325 @@
-import matplotlib.pyplot as plt
-import threading
-from flask import Flask, render_template, request, redirect, url_for, session, flash, send_file, get_flashed_messages
+from flask import Flask, Blueprint, current_app, render_template, request, redirect, url_for, session, flash, send_file, get_flashed_messages, jsonify, Response, before_render_template, stream_with_context
 import sqlite3
 from datetime import datetime
-import csv
 import os
-import glob
-import numpy as np
-from queue import Queue
-import hashlib
-
-app = Flask(__name__)
-app.config['SECRET_KEY'] = 'secret_key'
-
-# Setarea pentru a folosi Agg in loc de GUI in Matplotlib
-plt.switch_backend('Agg')
-
-# Coada pentru mesaje de avertizare
-warning_queue = Queue()
-
-# Creare tabele in baza de date SQLite
-def create_table():
-    # Tabel pentru utilizatori
-    connection = sqlite3.connect('users.db')
-    cursor = connection.cursor()
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS users (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            user_name TEXT UNIQUE NOT NULL,
-            password TEXT NOT NULL,
-            email TEXT UNIQUE NOT NULL
-        )
-    ''')
-    connection.commit()
-    connection.close()
-
-    # Tabel pentru cheltuieli
-    connection = sqlite3.connect('database.db')
-    cursor = connection.cursor()
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS expenses (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            user_name TEXT,
-            amount REAL,
-            date TEXT,
-            description TEXT NOT NULL,
-            category_name TEXT NOT NULL
-        )
-    ''')
-    connection.commit()
-    connection.close()
-
-    # Tabel pentru bugete pe categorii de cheltuieli
-    connection = sqlite3.connect('budgets.db')
-    cursor = connection.cursor()
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS budgets (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            user_name TEXT,
-            category_name TEXT,
-            budget_amount REAL,
-            budget_threshold_percentage INTEGER           
-        )
-    ''')
-    connection.commit()
-    connection.close()
-
-    # Tabel pentru categorii de cheltuieli
-    connection = sqlite3.connect('categories.db')
-    cursor = connection.cursor()
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS categories (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            user_name TEXT,
-            category_name TEXT UNIQUE NOT NULL           
-        )
-    ''')
-    connection.commit()
-    connection.close()
-
-create_table()
+from concurrent.futures import TimeoutError as RenderTimeout
+import click
+import db
+from db import get_db
+from chart_cache import ChartCache, chart_key
+from chart_renderer import ChartRenderer
+import chart_store
+from chart_store import ChartJanitor
+from csv_import import import_expenses, read_rows
+from csv_export import stream_export, write_export
+import columnar
+import report_pages
+import rollups
+import search
+from jobs import JobQueue
+import passwords
+import notifications
+import query_plans
+import metrics
+import money
+from passwords import PasswordHasher, HasherBusy
+
+# Rutele aplicatiei; sunt inregistrate in aplicatia creata de create_app()
+# (comenzile din linia de comanda raman de forma flask --app app <comanda>)
+bp = Blueprint('main', __name__, cli_group=None)
+
+# Serviciul name (chart_cache, chart_renderer, chart_janitor, job_queue, password_hasher, notification_store)
+# al aplicatiei curente; serviciile sunt create de create_app() si pastrate in app.extensions, deci mai multe
+# aplicatii create in acelasi proces nu le inlocuiesc una alteia
+def service(name):
+    return current_app.extensions['expenses'][name]
+
+
+# Interogarile frecvente ale rutelor (verificate si de query_plans / flask --app app check-query-plans)
+CHART_DATA_QUERY = '''
+    SELECT c.id, c.user_id, c.category_name,
+           COALESCE(b.budget_amount_cents, 0), COALESCE(b.budget_threshold_percentage, 0),
+           COALESCE(t.total_cents, 0)
+    FROM categories c
+    LEFT JOIN budgets b ON b.user_id = c.user_id AND b.category_name = c.category_name
+    LEFT JOIN category_totals t ON t.user_id = c.user_id AND t.category_name = c.category_name
+    WHERE c.user_id = ?
+    ORDER BY c.category_name
+'''
+BUDGET_QUERY = '''
+    SELECT b.budget_amount_cents, b.budget_threshold_percentage, COALESCE(t.total_cents, 0)
+    FROM budgets b
+    LEFT JOIN category_totals t ON t.user_id = b.user_id AND t.category_name = b.category_name
+    WHERE b.user_id = ? AND b.category_name = ?
+'''
+CATEGORY_TOTAL_QUERY = 'SELECT total_cents FROM category_totals WHERE user_id=? AND category_name=?'
+CATEGORIES_QUERY = 'SELECT * FROM categories WHERE user_id = ? ORDER BY category_name'
+CATEGORY_NAMES_QUERY = 'SELECT category_name FROM categories WHERE user_id = ?'
+DELETE_CATEGORY_EXPENSES = 'DELETE FROM expenses WHERE user_id = ? AND category_name = ?'
+
+
+# Bugetele si totalurile pentru mai multe categorii (count = numarul de categorii), pentru /api/expenses/batch
+def batch_budgets_query(count):
+    placeholders = ','.join(['?'] * count)
+    return f'''
+        SELECT b.category_name, b.budget_amount_cents, b.budget_threshold_percentage, COALESCE(t.total_cents, 0)
+        FROM budgets b
+        LEFT JOIN category_totals t ON t.user_id = b.user_id AND t.category_name = b.category_name
+        WHERE b.user_id = ? AND b.category_name IN ({placeholders})
+    '''
+
+
+# Creare aplicatie Flask (flask --app app run o gaseste automat). Importul modulului nu deschide
+# baza de date si nu incarca matplotlib / NumPy (acestea sunt importate la prima diagrama sau export);
+# tabelele sunt create sau actualizate explicit, cu flask --app app init-db.
+def create_app(config=None):
+    app = Flask(__name__)
+    app.config['SECRET_KEY'] = 'secret_key'
+    if config:
+        app.config.update(config)
+
+    # Instrumentare (dezactivata implicit): antet Server-Timing cu durata interogarilor SQL, a diagramei si
+    # a sablonului, pagina /metrics (format Prometheus, doar local) si jurnalul interogarilor mai lente de SLOW_QUERY_MS
+    app.config.setdefault('METRICS_ENABLED', False)
+    app.config.setdefault('SLOW_QUERY_MS', metrics.SLOW_QUERY_MS)
+    metrics.init_app(app)
+
+    # Conexiunile la baza de date sunt imprumutate din pool pe durata fiecarei cereri
+    db.init_app(app)
+
+    # Cache pentru imaginile diagramelor: dashboard-ul nu regenereaza diagrama daca datele nu s-au schimbat
+    app.config.setdefault('CHART_CACHE_SIZE', 128)
+    chart_cache = ChartCache(app.config['CHART_CACHE_SIZE'])
+    services = app.extensions['expenses'] = {'chart_cache': chart_cache}
+
+    # Diagramele sunt generate in procese separate; cererea asteapta cel mult CHART_RENDER_WAIT secunde,
+    # apoi afiseaza imaginea anterioara si pagina se reincarca dupa generare
+    app.config.setdefault('CHART_RENDER_WORKERS', 2)
+    app.config.setdefault('CHART_RENDER_WAIT', 1.0)
+    services['chart_renderer'] = ChartRenderer(chart_cache, app.config['CHART_RENDER_WORKERS'])
+
+    # Imaginile generate sunt pastrate in CHART_DIR si sterse in fundal dupa varsta si dimensiunea totala
+    # (nu la logout: alti utilizatori sau alte cereri pot afisa inca imaginile)
+    app.config.setdefault('CHART_DIR', chart_store.CHART_DIR)
+    app.config.setdefault('CHART_MAX_AGE_HOURS', chart_store.CHART_MAX_AGE_HOURS)
+    app.config.setdefault('CHART_MAX_BYTES', chart_store.CHART_MAX_BYTES)
+    app.config.setdefault('CHART_JANITOR_INTERVAL', chart_store.JANITOR_INTERVAL)
+    services['chart_janitor'] = ChartJanitor(app.config['CHART_DIR'], app.config['CHART_MAX_AGE_HOURS'],
+                                             app.config['CHART_MAX_BYTES'], app.config['CHART_JANITOR_INTERVAL'])
+
+    # Importurile mari si exporturile pe intervale lungi ruleaza ca joburi in fundal, cel mult JOB_WORKERS deodata
+    app.config.setdefault('JOB_WORKERS', 2)
+    app.config.setdefault('JOB_IMPORT_THRESHOLD', 1024 * 1024)  # dimensiunea fisierului incarcat, in bytes
+    app.config.setdefault('JOB_EXPORT_DAYS', 366)  # lungimea intervalului exportat, in zile
+    services['job_queue'] = JobQueue(app.config['JOB_WORKERS'], app=app)
+
+    # Numarul maxim de cheltuieli trimise intr-o cerere /api/expenses/batch
+    app.config.setdefault('EXPENSE_BATCH_MAX', 500)
+
+    # Numarul implicit de cheltuieli pe o pagina de raport
+    app.config.setdefault('REPORT_PAGE_SIZE', report_pages.PAGE_SIZE)
+
+    # Parolele sunt salvate cu scrypt (sau PBKDF2), calculat pe cel mult PASSWORD_HASH_WORKERS fire;
+    # hash-urile vechi (SHA-256) sunt recalculate la urmatorul login reusit
+    app.config.setdefault('PASSWORD_HASH_METHOD', passwords.HASH_METHOD)
+    app.config.setdefault('PASSWORD_SCRYPT_N', passwords.SCRYPT_N)
+    app.config.setdefault('PASSWORD_PBKDF2_ITERATIONS', passwords.PBKDF2_ITERATIONS)
+    app.config.setdefault('PASSWORD_HASH_WORKERS', passwords.HASH_WORKERS)
+    services['password_hasher'] = PasswordHasher(
+        app.config['PASSWORD_HASH_METHOD'], app.config['PASSWORD_SCRYPT_N'],
+        app.config['PASSWORD_PBKDF2_ITERATIONS'], app.config['PASSWORD_HASH_WORKERS'])
+
+    # Alertele de buget sunt pastrate pentru fiecare utilizator pana la urmatoarea pagina afisata:
+    # 'memory' (in procesul curent) sau 'sqlite' (tabelul notifications, comun tuturor workerilor)
+    app.config.setdefault('NOTIFICATION_STORE', 'memory')
+    app.config.setdefault('NOTIFICATION_LIMIT', notifications.NOTIFICATION_LIMIT)
+    app.config.setdefault('NOTIFICATION_TTL_HOURS', notifications.NOTIFICATION_TTL_HOURS)
+    services['notification_store'] = notifications.STORES[app.config['NOTIFICATION_STORE']](
+        app.config['NOTIFICATION_LIMIT'], app.config['NOTIFICATION_TTL_HOURS'])
+    before_render_template.connect(deliver_notifications, app)
+
+    # Sumele sunt pastrate in subunitati (intregi); filtrul money le afiseaza cu doua zecimale
+    app.add_template_filter(money.format_cents, 'money')
+
+    # Modul de afisare a diagramei: 'server' (imagine PNG generata cu matplotlib) sau 'client' (desenata in browser)
+    app.config.setdefault('CHART_MODE', 'server')
+
+    app.register_blueprint(bp)
+    return app
+
+
+# Comanda pentru crearea tabelelor si aplicarea migrarilor lipsa: flask --app app init-db
+# (poate fi rulata de oricate ori; la o baza de date actualizata nu modifica nimic)
+@bp.cli.command('init-db')
+def init_db():
+    with db.connection() as conn:
+        before = conn.execute('PRAGMA user_version').fetchone()[0]
+        db.create_schema(conn)
+        after = conn.execute('PRAGMA user_version').fetchone()[0]
+    if before == after:
+        print(f'Database schema is up to date (version {after}).')
+    else:
+        print(f'Database schema migrated from version {before} to {after}.')
+
+
+# Comanda pentru stergerea imaginilor vechi ale diagramelor (ex. din cron): flask --app app clean-charts
+@bp.cli.command('clean-charts')
+def clean_charts():
+    removed, total = service('chart_janitor').sweep()
+    print(f'{removed} chart images removed, {total // 1024} KiB kept.')
+
+
+# Comanda pentru mutarea datelor din fisierele vechi de baza de date: flask --app app migrate-legacy-db
+@bp.cli.command('migrate-legacy-db')
+def migrate_legacy_db():
+    with db.connection() as conn:
+        db.create_schema(conn)
+        moved = db.migrate_legacy(conn)
+    if not moved:
+        print('No legacy database files found.')
+    for table, count in moved.items():
+        print(f'{table}: {count} rows migrated')
+
+
+# Comanda care verifica faptul ca interogarile frecvente folosesc indecsi: flask --app app check-query-plans
+@bp.cli.command('check-query-plans')
+def check_query_plans():
+    with db.connection() as conn:
+        table_scans = query_plans.table_scans(conn)
+    for name, detail in table_scans:
+        print(f'{name}: {detail}')
+    if table_scans:
+        raise SystemExit(1)
+    print('All hot queries use an index.')
+
+
+# Comanda pentru recalcularea totalurilor pe categorii si pe zile: flask --app app rebuild-totals [--verify-only]
+@bp.cli.command('rebuild-totals')
+@click.option('--verify-only', is_flag=True, help='Only report differences, do not rebuild.')
+def rebuild_totals(verify_only):
+    with db.connection() as conn:
+        mismatches = db.verify_totals(conn)
+        for key, expected, stored in mismatches:
+            # expected / stored sunt (total in subunitati, numar de cheltuieli) sau None daca randul lipseste
+            expected_total, expected_count = expected or (0, 0)
+            stored_total, stored_count = stored or (0, 0)
+            print(f"{'/'.join(map(str, key))}: expected {money.format_cents(expected_total)} ({expected_count} expenses), "
+                  f"stored {money.format_cents(stored_total)} ({stored_count} expenses)")
+        if verify_only:
+            if mismatches:
+                raise SystemExit(1)
+            print('Category totals are consistent.')
+        else:
+            db.rebuild_totals(conn)
+            print(f'Category totals rebuilt ({len(mismatches)} differences fixed).')
 
 
-# Functie pentru generare hash pentru o parola
+# Functie pentru generare hash pentru o parola (scrypt / PBKDF2 cu sare, calculat pe firele password_hasher)
 def generate_hash(password):
-    # Alegere algoritm de hash SHA-256
-    hash_algorithm = hashlib.sha256()
-
-    # Adaugare parola la obiectul de hash
-    hash_algorithm.update(password.encode('utf-8'))
+    return service('password_hasher').hash(password)
 
-    # Obtinere hash rezultat
-    password_hash = hash_algorithm.hexdigest()
-
-    return password_hash
-
-# Functie verificare daca o parola data corespunde unui hash dat
+# Functie verificare daca o parola data corespunde unui hash dat (inclusiv hash-urile SHA-256 vechi)
 def check_password(password, hashed_password):
-    hash_algorithm = hashlib.sha256()
-    hash_algorithm.update(password.encode('utf-8'))
-    return hash_algorithm.hexdigest() == hashed_password
-
-
-# Verificarea mesajelor de avertizare si adaugarea lor in contextul corect
-@app.before_request
-def process_warnings():
-    while not warning_queue.empty():
-        flash(warning_queue.get(), 'warning')
-
-
-# Stergere fisiere imagine PNG si JPG din folderul /static
-def delete_image_files():
-    # Afla directorul curent al app.py
-    app_folder = os.getcwd()
-    folder = app_folder + "\\static\\"
-    
-    # Creeaza cate un sablon pentru a gasi fisiere PNG respectiv JPG
-    png_glob = os.path.join(folder, '*.png')
-    jpg_glob = os.path.join(folder, '*.jpg')
-
-    # Gaseste toate fisierele care corespund sabloanelor
-    png_files = glob.glob(png_glob)
-    jpg_files = glob.glob(jpg_glob)
+    return service('password_hasher').verify(password, hashed_password)
 
-    # Combina listele de fisiere
-    images = png_files + jpg_files
 
-    # Sterge fiecare fisier gasit
-    for image in images:
-        try:
-            os.remove(image)
-            flash('File {image} was deleted.', 'success')
-        except Exception as e:
-            flash('Error at delete file {image}: {e}')
-
-# Creare si actualizare buget pentru o categorie de cheltuieli a utilizatorului curent
-def update_budget(user_name, category_name, amount, threshold):
-    connection = sqlite3.connect('budgets.db')
+# Creare si actualizare buget pentru o categorie de cheltuieli a utilizatorului curent (amount in subunitati)
+def update_budget(user_id, category_name, amount, threshold):
+    connection = get_db()
     cursor = connection.cursor()
 
     # Verifica daca exista deja un buget pentru categoria respectiva si utilizatorul dat
-    cursor.execute('SELECT id FROM budgets WHERE user_name = ? AND category_name = ?', (user_name, category_name))
+    cursor.execute('SELECT id FROM budgets WHERE user_id = ? AND category_name = ?', (user_id, category_name))
     budget_id = cursor.fetchone()
 
     if budget_id:
         # Actualizeaza bugetul existent, prin adaugare amount la valoarea existenta deja
-        cursor.execute('UPDATE budgets SET budget_amount = budget_amount + ? , budget_threshold_percentage = ? WHERE id = ?', (amount, threshold, budget_id[0]))
+        cursor.execute('UPDATE budgets SET budget_amount_cents = budget_amount_cents + ? , budget_threshold_percentage = ? WHERE id = ?', (amount, threshold, budget_id[0]))
     else:
         # Creeaza un nou buget daca nu exista 
-        cursor.execute('INSERT INTO budgets (user_name, category_name, budget_amount, budget_threshold_percentage) VALUES (?, ?, ?, ?)', (user_name, category_name, amount, threshold))
+        cursor.execute('INSERT INTO budgets (user_id, category_name, budget_amount_cents, budget_threshold_percentage) VALUES (?, ?, ?, ?)', (user_id, category_name, amount, threshold))
 
     connection.commit()
-    connection.close()
+    service('chart_cache').invalidate(user_id)
 
 # Stergere buget pentru o categorie de cheltuieli a utilizatorului curent
-def delete_budget(user_name, category_name):
-    connection = sqlite3.connect('budgets.db')
+def delete_budget(user_id, category_name):
+    connection = get_db()
     cursor = connection.cursor()
-    cursor.execute('DELETE FROM budgets WHERE user_name = ? AND category_name = ?', (user_name, category_name))
+    cursor.execute('DELETE FROM budgets WHERE user_id = ? AND category_name = ?', (user_id, category_name))
     connection.commit()
-    connection.close()
+    service('chart_cache').invalidate(user_id)
 
-# Aflare use_name al utilizatorului curent
+# Aflare user_name al utilizatorului curent. Numele utilizatorului logat este pastrat in sesiune,
+# deci baza de date este citita doar pentru alt utilizator sau daca numele lipseste din sesiune.
+# Intoarce None daca utilizatorul nu exista.
 def find_user_name(user_id):
-    connection = sqlite3.connect('users.db')
+    if user_id is not None and user_id == session.get('user_id') and session.get('user_name'):
+        return session['user_name']
+
+    connection = get_db()
     cursor = connection.cursor()
-    cursor.execute('SELECT * FROM users WHERE id=?', (user_id,))
-    users = cursor.fetchone()
-    if len(users):
-        user_name = users[1]
-    else:
-        user_name = "None"
-    connection.close()   
+    cursor.execute('SELECT user_name FROM users WHERE id=?', (user_id,))
+    user = cursor.fetchone()
+    return user[0] if user else None
 
-    return user_name
 
+# Pastrare identitate (id si nume) in sesiune la login
+def remember_user(user_id, user_name):
+    session['user_id'] = user_id
+    session['user_name'] = user_name
 
-# Pregatire date pentru afisarea in diagrama cu bare 2D
-def get_chart_data(user_name):
-    
-    conn = sqlite3.connect('categories.db')
-    cursor = conn.cursor()
-    cursor.execute('SELECT * FROM categories WHERE user_name = ? ORDER BY category_name', (user_name,))
-    categories_data = cursor.fetchall()
-    conn.close()
-    
-    conn = sqlite3.connect('budgets.db')
-    cursor = conn.cursor()
-    cursor.execute('SELECT * FROM budgets WHERE user_name = ? ORDER BY category_name', (user_name,))
-    budgets_data = cursor.fetchall()
-    conn.close()
 
-    conn = sqlite3.connect('database.db')
-    cursor = conn.cursor()
-    cursor.execute('SELECT category_name, SUM(amount) FROM expenses WHERE user_name = ? GROUP BY category_name ORDER BY category_name', (user_name,))
-    expenses_data = cursor.fetchall()
-    conn.close()
+# Numele din sesiune este sters si va fi recitit din baza de date (ex. dupa modificarea contului)
+def forget_user():
+    session.pop('user_name', None)
 
-    data = {'categories': [], 'expenses': [], 'budgets': [], 'thresholds': []}
 
-    for category_name in categories_data:
-        data['categories'].append(category_name)
-    
-    for expense_amount in expenses_data:
-        data['expenses'].append(expense_amount)
-
-    for row in budgets_data:
-        user_id, user_name, category_name, budget, threshold = row
-        data['budgets'].append(budget)
-        data['thresholds'].append(threshold*budget/100)
+# Verificare identitate la inceputul fiecarei cereri: o sesiune fara utilizator valid este inchisa,
+# astfel incat rutele redirectioneaza catre login in loc sa lucreze cu un utilizator inexistent
+@bp.before_app_request
+def load_user():
+    if 'user_id' not in session:
+        return
+    user_id = session['user_id']
+    if user_id is not None and session.get('user_name'):
+        return
 
-    return data
+    user_name = find_user_name(user_id) if user_id is not None else None
+    if user_name is None:
+        session.pop('user_id', None)
+        session.pop('user_name', None)
+    else:
+        remember_user(user_id, user_name)
 
-# Afisare diagrama 2D cu bare pentru cheltuieli
-def create_category_chart(data, result_queue):
-    categories = data['categories']
-    expenses = data['expenses']
-    budgets = data['budgets']
-    thresholds = data['thresholds']
 
-    bar_width = 0.2  # Latimea fiecarei bare
+# Livrare notificari la afisarea unei pagini (nu la raspunsurile JSON sau redirectionari): alertele
+# utilizatorului curent sunt adaugate la mesajele flash, inainte ca sablonul sa le citeasca
+def deliver_notifications(sender, template, context, **extra):
+    if session.get('user_id') is None:
+        return
+    for category, message in service('notification_store').pop(get_db(), session['user_id']):
+        flash(message, category)
 
-    if len(categories):
-        indices = np.arange(len(categories))
 
-        fig, ax = plt.subplots()
+# Pregatire date pentru afisarea in diagrama cu bare 2D (sumele in subunitati, ca intregi)
+def get_chart_data(user_id):
+    # O singura interogare: categoriile utilizatorului, bugetul si totalul cheltuielilor pentru fiecare
+    # (totalurile sunt pastrate in category_totals, nu recalculate din tot istoricul)
+    conn = get_db()
+    cursor = conn.cursor()
+    cursor.execute(CHART_DATA_QUERY, (user_id,))
+    rows = cursor.fetchall()
 
-    
-        for i, (budget, threshold, expense) in enumerate(zip(budgets, thresholds, expenses)):
-            bars_budgets = ax.bar(i, float(budget), bar_width, label='Budget Value' if i == 0 else '', color='green')
-            bars_thresholds = ax.bar(i + bar_width, float(threshold), bar_width, label='Threshold Value' if i == 0 else '', color='orange')
-            bars_expenses = ax.bar(i + (2 * bar_width), float(expense[1]), bar_width, label='Total Expenses' if i == 0 else '', color='red')
-            ax.text(i , budget + 5, str(budget), ha='center', va='bottom', rotation='horizontal')
-            ax.text(i + bar_width, threshold + 5, str(threshold), ha='center', va='bottom', rotation='horizontal')
-            ax.text(i + (2 * bar_width), expense[1] + 5, str(expense[1]), ha='center', va='bottom', rotation='horizontal')
-
-        ax.set_xticks(indices)
-        ax.set_xticklabels([category[2] for category in categories])
-        ax.legend()
-    
-        users = [category[1] for category in categories]
-        if len(users):
-            user_name = users[0]
-        else:
-            user_name = "None"
-    
-        # Salvare grafic într-un fișier de imagine PNG
-        image_name = "chart_image_" + user_name + ".png"
-        # am adaugat "static/" in cale pentru a stoca in directorul static
-        image_path = "static/" + image_name  
-        plt.savefig(image_path)
-
-        # Inchidere ferestre Matplotlib
-        plt.close(fig)
-    else:    
-        image_path = "static/images/money.jpg"
-        warning_queue.put('Expense categories are missing. Please insert one!')
+    data = {'categories': [], 'expenses': [], 'budgets': [], 'thresholds': []}
 
-    # Pune imaginea în coada pentru a fi preluata in firul principal
-    result_queue.put(image_path)
+    for category_id, category_user, category_name, budget, threshold, total in rows:
+        data['categories'].append((category_id, category_user, category_name))
+        data['expenses'].append((category_name, total))
+        data['budgets'].append(budget)
+        data['thresholds'].append(money.percent_of(budget, threshold))
 
-# Adauga valori pe barele din diagrama 2D
-def add_values_on_bars(bars):
-    for bar in bars:
-        yval = bar.get_height()
-        plt.text(bar.get_x() + bar.get_width()/2, yval, round(yval, 2), ha='center', va='bottom')
+    return data
 
 # Validare date de inceput si de sfarsit de interval calendaristic
 def validate_date_range(start_date, end_date):
@@ -278,121 +333,184 @@ def validate_date_range(start_date, end_date):
 
 # Functii de management categorii de cheltuieli
 # Aflare categorii de cheltuieli pentru utilizatorul curent
-def get_expense_categories(user_name):
-    connection = sqlite3.connect('categories.db')
+def get_expense_categories(user_id):
+    connection = get_db()
     cursor = connection.cursor()
 
-    cursor.execute('SELECT * FROM categories WHERE user_name = ? ORDER BY category_name', (user_name,))
+    cursor.execute(CATEGORIES_QUERY, (user_id,))
     categories = cursor.fetchall()
 
-    connection.close()
     return categories
 
-# Adaugare o noua categorie de cheltuieli pentru utilizatorul curent
-def add_expense_category(user_name, category_name):
-    connection = sqlite3.connect('categories.db')
+# Adaugare o noua categorie de cheltuieli pentru utilizatorul curent; intoarce False daca exista deja
+def add_expense_category(user_id, category_name):
+    connection = get_db()
     cursor = connection.cursor()
 
+    # Numele categoriei este unic pentru fiecare utilizator (alti utilizatori pot avea aceeasi categorie);
+    # pentru o categorie existenta nu se adauga inca o cheltuiala cu valoarea 0
     try:
-        cursor.execute('INSERT INTO categories (user_name, category_name) VALUES (?, ?)', (user_name, category_name))
-        connection.commit()
-    except sqlite3.IntegrityError as e:
-        flash('Category already existing!', 'error')
-
-    connection.close()
+        cursor.execute('INSERT INTO categories (user_id, category_name) VALUES (?, ?)', (user_id, category_name))
+    except sqlite3.IntegrityError:
+        return False
 
     # Creaza o cheltuiala cu valoarea 0 in data curenta si salveaz-o in tabelul expenses
-    connection = sqlite3.connect('database.db')
-    cursor = connection.cursor()
-    
+
     # Obtinere data curenta
     current_date = datetime.now()
 
     # Formatare data in formatul dorit
     formatted_date = current_date.strftime("%Y-%m-%d")
-    cursor.execute('INSERT INTO expenses (user_name, amount, date , description, category_name) VALUES (?, ?, ?, ?, ?)', (user_name, 0.0, formatted_date, "***", category_name))
+    cursor.execute('INSERT INTO expenses (user_id, amount_cents, date , description, category_name) VALUES (?, ?, ?, ?, ?)', (user_id, 0, formatted_date, "***", category_name))
     connection.commit()
-    connection.close()
+    service('chart_cache').invalidate(user_id)
+    return True
 
 # Stergere categorie de cheltuieli pentru utilizatorul curent
-def delete_expense_category(category_name):
-    connection = sqlite3.connect('categories.db')
-    cursor = connection.cursor()
-    cursor.execute('DELETE FROM categories WHERE category_name = ?', (category_name,))
-    connection.commit()
-    connection.close()
-
-    connection = sqlite3.connect('database.db')
+def delete_expense_category(user_id, category_name):
+    connection = get_db()
     cursor = connection.cursor()
-    cursor.execute('DELETE FROM expenses WHERE category_name = ?', (category_name,))
+    # Categoria si cheltuielile ei sunt sterse in aceeasi tranzactie
+    cursor.execute('DELETE FROM categories WHERE user_id = ? AND category_name = ?', (user_id, category_name))
+    cursor.execute(DELETE_CATEGORY_EXPENSES, (user_id, category_name))
     connection.commit()
-    connection.close()
+    service('chart_cache').invalidate(user_id)
 
 
 # Verifica daca tabelul cu utilizatori este gol (Nu exista utilizatori inregistrati)
 def is_table_empty(table_name):
-    conn = sqlite3.connect('users.db')
+    conn = get_db()
     cursor = conn.cursor()
     cursor.execute(f'SELECT COUNT(*) FROM {table_name}')
     row_count = cursor.fetchone()[0]
-    conn.close()
 
     return row_count == 0
 
-# Adauga cheltuiala noua in tabelul de cheltuieli 
-def add_expense(user_name, amount, date, description, category_name):
-    # Calculeaza valoarea cheltuielilor anterioare din categoria aleasa a utilizatorului curent
-    connection = sqlite3.connect('database.db')
-    cursor = connection.cursor()
-    cursor.execute('SELECT SUM(amount) FROM expenses WHERE user_name = ? AND category_name = ?', (user_name, category_name))
-    old_expenses_amount = cursor.fetchone()[0]
-    connection.commit()
-    connection.close()
-
-    # Obtine bugetul alocat pentru categoria curenta
-    connection = sqlite3.connect('budgets.db')
-    cursor = connection.cursor()
-    cursor.execute('SELECT budget_amount, budget_threshold_percentage FROM budgets WHERE user_name = ? AND category_name = ?', (user_name, category_name))
-    budgets = cursor.fetchone()
-    budget_amount = budgets[0]
-    budget_threshold = float(budgets[1]) * budget_amount / 100
-    connection.commit()
-    connection.close()
-
-    # Converteste amount din str in float
-    amount_float = float(amount)
+# Verificare cheltuiala fata de bugetul categoriei si suma deja cheltuita (toate in subunitati, comparate ca
+# intregi, deci exact). Intoarce (acceptata, alertele ca lista de (categorie, mesaj)).
+def check_budget(category_name, budget_cents, threshold_percentage, spent_cents, amount_cents):
+    threshold_cents = money.percent_of(budget_cents, threshold_percentage)
+    budget_amount = money.format_cents(budget_cents)
+    amount = money.format_cents(amount_cents)
 
     # Verifica daca cu suma cheltuielii se depaseste bugetul
-    if ((old_expenses_amount + amount_float) > budget_amount):
-        flash(f'Expense exceeds budget for {category_name}! Budget:{budget_amount}, Expense:{amount}', 'warning')
-        return 0
-    # Atentioneaza ca sunt cheltuieli excesive
-    elif ((amount_float > (budget_amount*0.20))):
-        flash(f'Expense is excesive for {category_name}! Budget:{budget_amount}, Expense:{amount}', 'info')
+    if ((spent_cents + amount_cents) > budget_cents):
+        return False, [('warning', f'Expense exceeds budget for {category_name}! Budget:{budget_amount}, Expense:{amount}')]
+    # Atentioneaza ca sunt cheltuieli excesive (peste 20% din buget)
+    elif ((amount_cents * 5 > budget_cents)):
+        return True, [('info', f'Expense is excesive for {category_name}! Budget:{budget_amount}, Expense:{amount}')]
     # Atentioneaza ca ai depasit pragul de atentionare al bugetului alocat
-    elif ((old_expenses_amount + amount_float) > budget_threshold):
-        flash(f'Expenses exceed threshold level for {category_name}! Budget:{budget_amount}, Budget_Threshold:{budget_threshold}, Expense: {amount}', 'info')
+    elif ((spent_cents + amount_cents) > threshold_cents):
+        return True, [('info', f'Expenses exceed threshold level for {category_name}! Budget:{budget_amount}, Budget_Threshold:{money.format_cents(threshold_cents)}, Expense: {amount}')]
+    return True, []
 
-    
-    connection = sqlite3.connect('database.db')
-    cursor = connection.cursor()
-    
+# Adauga cheltuiala noua in tabelul de cheltuieli (amount_cents in subunitati)
+def add_expense(user_id, amount_cents, date, description, category_name):
     # Convertirea string-ului in obiect datetime
     date_datetime = datetime.strptime(date, '%Y-%m-%d')
 
     # Formatarea obiectului datetime
     formatted_date = date_datetime.strftime('%Y-%m-%d')
-    
-    cursor.execute('INSERT INTO expenses (user_name, amount, date, description, category_name) VALUES (?, ?, ?, ?, ?)',
-                   (user_name, amount, formatted_date, description, category_name))
 
-    connection.commit()
-    connection.close()
+    # Verificarea bugetului si inserarea sunt o singura tranzactie BEGIN IMMEDIATE: doua cheltuieli trimise
+    # in acelasi timp (alte fire sau alti workeri) nu pot trece amandoua de verificare si depasi bugetul,
+    # deoarece a doua citeste totalul abia dupa ce prima a fost salvata
+    connection = get_db()
+    with db.immediate(connection):
+        # Obtine bugetul alocat pentru categoria curenta si valoarea cheltuielilor anterioare, intr-o singura interogare
+        cursor = connection.cursor()
+        cursor.execute(BUDGET_QUERY, (user_id, category_name))
+        budgets = cursor.fetchone()
+        if budgets is None:
+            service('notification_store').push(connection, user_id, f'No budget defined for {category_name}!', 'warning')
+            return 0
+        # Alertele sunt livrate utilizatorului la urmatoarea pagina afisata
+        accepted, alerts = check_budget(category_name, *budgets, amount_cents)
+        for category, message in alerts:
+            service('notification_store').push(connection, user_id, message, category)
+        if not accepted:
+            return 0
+
+        cursor.execute('INSERT INTO expenses (user_id, amount_cents, date, description, category_name) VALUES (?, ?, ?, ?, ?)',
+                       (user_id, amount_cents, formatted_date, description, category_name))
+
+    service('chart_cache').invalidate(user_id)
     return 1
 
+
+# Validare cheltuiala dintr-o cerere JSON ({"amount", "date", "description", "category"}):
+# intoarce ((amount_cents, date, description, category_name), None) sau (None, eroarea)
+def parse_expense_item(item):
+    if not isinstance(item, dict):
+        return None, 'expected an object'
+    try:
+        amount_cents = money.to_cents(item.get('amount'))
+    except ValueError:
+        return None, f"invalid amount {item.get('amount')!r}"
+    if amount_cents <= 0:
+        return None, 'amount must be positive'
+    try:
+        date = datetime.strptime(str(item.get('date')), '%Y-%m-%d').strftime('%Y-%m-%d')
+    except ValueError:
+        return None, f"invalid date {item.get('date')!r}"
+    description = item.get('description')
+    category_name = item.get('category')
+    if not isinstance(description, str) or not description or not isinstance(category_name, str) or not category_name:
+        return None, 'description and category are required'
+    return (amount_cents, date, description, category_name), None
+
+
+# Adaugare mai multe cheltuieli intr-o singura tranzactie BEGIN IMMEDIATE (ca add_expense): bugetele tuturor
+# categoriilor sunt citite o singura data, iar fiecare cheltuiala este verificata fata de totalul actualizat
+# cu cheltuielile acceptate inaintea ei din aceeasi cerere. Cheltuielile invalide sau peste buget sunt respinse,
+# celelalte sunt salvate. Intoarce rezultatul fiecarei cheltuieli (in ordinea primita) si alertele generate;
+# alertele sunt trimise in raspuns, nu pastrate pentru pagina urmatoare.
+def add_expenses(user_id, items):
+    results = [None] * len(items)
+    alerts = []
+    parsed = []
+    for index, item in enumerate(items):
+        values, error = parse_expense_item(item)
+        if values is None:
+            results[index] = {'index': index, 'status': 'rejected', 'error': error}
+        else:
+            parsed.append((index, values))
+
+    added = 0
+    connection = get_db()
+    with db.immediate(connection):
+        cursor = connection.cursor()
+        budgets = {}
+        category_names = sorted({values[3] for index, values in parsed})
+        if category_names:
+            cursor.execute(batch_budgets_query(len(category_names)), (user_id, *category_names))
+            budgets = {row[0]: list(row[1:]) for row in cursor.fetchall()}
+
+        for index, (amount_cents, date, description, category_name) in parsed:
+            budget = budgets.get(category_name)
+            if budget is None:
+                accepted, item_alerts = False, [('warning', f'No budget defined for {category_name}!')]
+            else:
+                accepted, item_alerts = check_budget(category_name, *budget, amount_cents)
+            alerts.extend({'index': index, 'category': category, 'message': message} for category, message in item_alerts)
+
+            if not accepted:
+                results[index] = {'index': index, 'status': 'rejected', 'error': item_alerts[0][1]}
+                continue
+            # Totalul cheltuit pe categorie include cheltuielile acceptate deja din aceasta cerere
+            budget[2] += amount_cents
+            cursor.execute('INSERT INTO expenses (user_id, amount_cents, date, description, category_name) VALUES (?, ?, ?, ?, ?)',
+                           (user_id, amount_cents, date, description, category_name))
+            results[index] = {'index': index, 'status': 'added', 'id': cursor.lastrowid}
+            added += 1
+
+    if added:
+        service('chart_cache').invalidate(user_id)
+    return results, alerts
+
 # Rutele pentru aplicatie
 # Ruta pentru pagina de inceput (index)
-@app.route('/')
+@bp.route('/')
 def index():
     # Obtinerea si golirea mesajelor flash
     messages = get_flashed_messages()
@@ -400,241 +518,530 @@ def index():
 
 
 # Ruta pentru pagina de logare
-@app.route('/login', methods=['GET', 'POST'])
+@bp.route('/login', methods=['GET', 'POST'])
 def login():
-    if 'user_id' not in session:
-        session['user_id'] = None
-
     if is_table_empty('users'):
         flash('No users registered!. Please register first!', 'error')
-        return redirect(url_for('register'))
+        return redirect(url_for('main.register'))
 
     if request.method == 'POST':
         email = request.form['email']
         password = request.form['password']
 
-        connection = sqlite3.connect('users.db')
+        connection = get_db()
         cursor = connection.cursor()
         cursor.execute('SELECT * FROM users WHERE email=?', (email,))
         user = cursor.fetchone()
 
-        if user and check_password(password, user[2]):
-            session['user_id'] = user[0]
+        try:
+            valid = user is not None and check_password(password, user[2])
+        except HasherBusy:
+            flash('Server is busy, please try again in a moment.', 'error')
+            return render_template('login.html'), 503
+
+        if valid:
+            # Hash-ul vechi (SHA-256 sau alt cost) este inlocuit, acum ca parola este cunoscuta
+            # (daca serverul este ocupat, hash-ul este inlocuit la urmatorul login)
+            if service('password_hasher').needs_rehash(user[2]):
+                try:
+                    cursor.execute('UPDATE users SET password = ? WHERE id = ?', (generate_hash(password), user[0]))
+                    connection.commit()
+                except HasherBusy:
+                    pass
+            remember_user(user[0], user[1])
+            service('notification_store').purge(connection)
             flash('Login successful!', 'success')
-            return redirect(url_for('dashboard'))
+            return redirect(url_for('main.dashboard'))
         else:
             flash('Invalid email or password', 'error')
-        connection.close()
 
     return render_template('login.html')
 
 
 # Ruta pentru pagina de inregistrare utilizator nou
-@app.route('/register', methods=['GET', 'POST'])
+@bp.route('/register', methods=['GET', 'POST'])
 def register():
-    if 'user_id' not in session:
-        session['user_id'] = None
-
     if request.method == 'POST':
         name = request.form['name'] 
         email = request.form['email']
         password = request.form['password']
 
-        connection = sqlite3.connect('users.db')
+        connection = get_db()
         cursor = connection.cursor()
         try:
             password_hash = generate_hash(password)
             cursor.execute('INSERT INTO users (user_name, password, email) VALUES (?, ?, ?)', (name, password_hash, email))
             connection.commit()
-            connection.close()
             flash('Registration successful! Please log in.', 'success')
-            return redirect(url_for('login'))
+            return redirect(url_for('main.login'))
         except sqlite3.IntegrityError as e:
             flash('User name OR e-mail address already registered. Please change!', 'error')
-        connection.close()
+        except HasherBusy:
+            flash('Server is busy, please try again in a moment.', 'error')
+            return render_template('register.html'), 503
 
     return render_template('register.html')
     
 # Ruta pentru pagina de selectare a operatiunilor asupra cheltuielilor
-@app.route('/dashboard', methods=['GET', 'POST'])
+@bp.route('/dashboard', methods=['GET', 'POST'])
 def dashboard():
     if 'user_id' not in session:
         flash('Please log in first', 'error')
-        return redirect(url_for('login'))
+        return redirect(url_for('main.login'))
     
     user_id = session['user_id']
-    user_name = find_user_name(user_id)
     
     # Obtine datele pentru diagrame
-    data = get_chart_data(user_name)
+    data = get_chart_data(user_id)
+
+    if not len(data['categories']):
+        flash('Expense categories are missing. Please insert one!', 'warning')
+
+    # In modul 'client' diagrama este desenata in browser, pe baza datelor de la /api/chart_data
+    if current_app.config['CHART_MODE'] == 'client' and len(data['categories']):
+        return render_template('dashboard.html', chart_mode='client', bar_chart_image=None, chart_pending=False)
+
+    # Diagrama este regenerata doar daca datele s-au schimbat fata de o afisare anterioara
+    chart_pending = False
+    if len(data['categories']):
+        key = chart_key(data)
+        image_path = chart_store.chart_path(user_id, key, current_app.config['CHART_DIR'])
+
+        if service('chart_cache').get(user_id, key, image_path) is None:
+            # Generarea este trimisa catre procesele de lucru; un job identic aflat in lucru este refolosit
+            job = service('chart_renderer').submit(user_id, key, data, image_path)
+            service('chart_janitor').start()
+            try:
+                with metrics.span('chart'):
+                    job.result(timeout=current_app.config['CHART_RENDER_WAIT'])
+            except RenderTimeout:
+                # Pana la finalizare se afiseaza imaginea anterioara (sau imaginea implicita)
+                image_path = service('chart_cache').previous(user_id) or "static/images/money.jpg"
+                chart_pending = True
+            except Exception as e:
+                flash(f'Chart could not be generated: {e}', 'error')
+                image_path = "static/images/money.jpg"
+    else:
+        image_path = "static/images/money.jpg"
 
-    # Creeaza coada pentru a comunica intre fire
-    result_queue = Queue()
+    return render_template('dashboard.html', chart_mode='server', bar_chart_image=image_path, chart_pending=chart_pending)
 
-    # Creeaza firul pentru afisarea graficului si furnizează coada ca argument
-    chart_thread = threading.Thread(target=create_category_chart, args=(data, result_queue))
 
-    # Pornirea firului
-    chart_thread.start()
+# Ruta care intoarce datele diagramei in format JSON (folosita de modul 'client' al dashboard-ului)
+@bp.route('/api/chart_data')
+def chart_data():
+    if 'user_id' not in session:
+        return jsonify({'error': 'Please log in first'}), 401
 
-    # Asteaptă ca firul sa se termine
-    chart_thread.join()
+    user_id = session['user_id']
+    data = get_chart_data(user_id)
 
-    # Obtine rezultatul (calea catre fisierul de imagine) din coada
-    image_path = result_queue.get()
+    response = jsonify({
+        'categories': [category[2] for category in data['categories']],
+        'expenses': [money.to_units(expense[1]) for expense in data['expenses']],
+        'budgets': [money.to_units(budget) for budget in data['budgets']],
+        'thresholds': [money.to_units(threshold) for threshold in data['thresholds']],
+    })
 
-    return render_template('dashboard.html', bar_chart_image=image_path)
+    # ETag calculat din date: browserul primeste 304 daca datele nu s-au schimbat
+    response.set_etag(chart_key(data))
+    response.headers['Cache-Control'] = 'private, no-cache'
+    return response.make_conditional(request)
 
 
 # Ruta pentru categorii de cheltuieli
-@app.route('/categories')
+@bp.route('/categories')
 def categories():
     if 'user_id' not in session:
         flash('Please log in first', 'error')
-        return redirect(url_for('login'))
+        return redirect(url_for('main.login'))
     
     user_id = session['user_id']
-    user_name = find_user_name(user_id)
 
-    categories = get_expense_categories(user_name)  
+    categories = get_expense_categories(user_id)  
     return render_template('categories.html', categories=categories)
 
 # Adaugare categorie de cheltuieli in ruta pentru categorii de cheltuieli
-@app.route('/add_category', methods=['POST'])
+@bp.route('/add_category', methods=['POST'])
 def add_category():
     if 'user_id' not in session:
         flash('Please log in first', 'error')
-        return redirect(url_for('login'))
+        return redirect(url_for('main.login'))
         
     user_id = session['user_id']
-    user_name = find_user_name(user_id)
 
     category_name = request.form.get('category_name')
     budget = request.form.get('budget')
     budget_threshold = request.form.get('budget_threshold_percentage')
+    try:
+        budget_cents = money.to_cents(budget)
+    except ValueError:
+        flash('Invalid budget value', 'error')
+        return redirect(url_for('main.categories'))
+    # Pragul de alerta este un procent intreg din buget (folosit de money.percent_of la fiecare afisare)
+    try:
+        budget_threshold = int(budget_threshold)
+    except (TypeError, ValueError):
+        budget_threshold = None
+    if budget_threshold is None or not 0 <= budget_threshold <= 100:
+        flash('Budget threshold must be a whole number between 0 and 100', 'error')
+        return redirect(url_for('main.categories'))
     if category_name:
-        add_expense_category(user_name, category_name)  
-        # Adaugarea bugetului in tabela budgets
-        update_budget(user_name, category_name, budget, budget_threshold)
+        added = add_expense_category(user_id, category_name)
+        # Adaugarea bugetului in tabela budgets (pentru o categorie existenta suma se adauga la bugetul ei
+        # si pragul este inlocuit)
+        update_budget(user_id, category_name, budget_cents, budget_threshold)
 
-        flash('Category added/modified successfully!')
+        flash('Category added successfully!' if added else 'Category modified successfully!')
     else:
         flash('Category name cannot be empty', 'error')
 
-    return redirect(url_for('categories'))
+    return redirect(url_for('main.categories'))
 
 # Stergere categorie de cheltuieli in ruta pentru categorii de cheltuieli
-@app.route('/delete_category/<category_name>')
+@bp.route('/delete_category/<category_name>')
 def delete_category(category_name):
     if 'user_id' not in session:
         flash('Please log in first', 'error')
-        return redirect(url_for('login'))
+        return redirect(url_for('main.login'))
 
     user_id = session['user_id']
-    user_name = find_user_name(user_id)
 
     # Verific ca la categoria de cheltuieli nu exista cheltuieli pentru a o putea sterge
-    connection = sqlite3.connect('database.db')
+    connection = get_db()
     cursor = connection.cursor()
-    cursor.execute('SELECT category_name, SUM(amount) FROM expenses WHERE user_name=? AND category_name=?', (user_name, category_name))
+    cursor.execute(CATEGORY_TOTAL_QUERY, (user_id, category_name))
     expense_value = cursor.fetchone()
-    connection.close()
     
-    if expense_value[1] == 0:
-        delete_expense_category(category_name)
-        delete_budget(user_name, category_name)
+    if expense_value is None or expense_value[0] == 0:
+        delete_expense_category(user_id, category_name)
+        delete_budget(user_id, category_name)
         flash('Category ' + category_name + ' deleted successfully!')
     else:
         flash('Category ' + category_name + ' has expenses and can not be deleted!')
 
-    return redirect(url_for('categories'))
+    return redirect(url_for('main.categories'))
 
 # Ruta pentru pagina de adaugare de noi cheltuieli
-@app.route('/expense_form', methods=['GET', 'POST'])
+@bp.route('/expense_form', methods=['GET', 'POST'])
 def expense_form():
     if 'user_id' not in session:
         flash('Please log in first', 'error')
-        return redirect(url_for('login'))
+        return redirect(url_for('main.login'))
 
     user_id = session['user_id']
-    user_name = find_user_name(user_id)
 
     if request.method == 'POST':
         amount = request.form.get('amount')
         date = request.form.get('date')
         description = request.form.get('description')
         category_name = request.form.get('category')  
-    
+        # Suma este validata inainte de tranzactie; o suma negativa ar scadea totalul categoriei
+        # si ar elibera buget pentru cheltuielile urmatoare (aceeasi regula ca /api/expenses/batch)
+        error = None
+        try:
+            amount_cents = money.to_cents(amount)
+        except ValueError:
+            error = 'Invalid amount'
+        else:
+            if amount_cents <= 0:
+                error = 'amount must be positive'
+
         # Adaugarea cheltuielii in baza de date
-        if (add_expense(user_name, amount, date, description, category_name)):
+        try:
+            added = error is None and add_expense(user_id, amount_cents, date, description, category_name)
+        except sqlite3.OperationalError:
+            # Alt scriitor a tinut baza de date blocata mai mult decat busy_timeout
+            flash('Server is busy, please try again in a moment.', 'error')
+            return render_template('expense_form.html', categories=get_expense_categories(user_id)), 503
+        if error is not None:
+            flash(error, 'error')
+        elif (added):
             flash('Expense added successfully!')
-            return redirect(url_for('dashboard'))
+            return redirect(url_for('main.dashboard'))
         else:
              flash('Expense not added!', 'warning')   
 
     # Obținerea categoriilor pentru a le afisa in formular
-    categories = get_expense_categories(user_name)
+    categories = get_expense_categories(user_id)
 
     return render_template('expense_form.html', categories=categories)
 
+# Ruta pentru adaugarea mai multor cheltuieli printr-o singura cerere JSON (ex. sincronizarea unei aplicatii mobile):
+# {"expenses": [{"amount": "12.50", "date": "2024-01-31", "description": "...", "category": "..."}, ...]}
+# Raspunsul contine rezultatul fiecarei cheltuieli (added cu id-ul ei sau rejected cu motivul) si alertele de buget.
+@bp.route('/api/expenses/batch', methods=['POST'])
+def expenses_batch():
+    if 'user_id' not in session:
+        return jsonify({'error': 'Please log in first'}), 401
+
+    payload = request.get_json(silent=True)
+    items = payload.get('expenses') if isinstance(payload, dict) else payload
+    if not isinstance(items, list) or not items:
+        return jsonify({'error': 'Expected a non-empty list of expenses'}), 400
+    if len(items) > current_app.config['EXPENSE_BATCH_MAX']:
+        return jsonify({'error': f"At most {current_app.config['EXPENSE_BATCH_MAX']} expenses per request"}), 413
+
+    try:
+        results, alerts = add_expenses(session['user_id'], items)
+    except sqlite3.OperationalError:
+        # Alt scriitor a tinut baza de date blocata mai mult decat busy_timeout
+        return jsonify({'error': 'Server is busy, please try again in a moment.'}), 503
+
+    added = sum(1 for result in results if result['status'] == 'added')
+    return jsonify({'added': added, 'rejected': len(results) - added, 'results': results, 'alerts': alerts})
+
 # Ruta pentru pagina de rapoarte
-@app.route('/reports', methods=['GET', 'POST'])
+@bp.route('/reports', methods=['GET', 'POST'])
 def reports():
     if 'user_id' not in session:
         flash('Please log in first', 'error')
-        return redirect(url_for('login'))
+        return redirect(url_for('main.login'))
  
     user_id = session['user_id']
-    user_name = find_user_name(user_id)
  
-    connection = sqlite3.connect('categories.db')
+    connection = get_db()
     cursor = connection.cursor()
-    cursor.execute("SELECT category_name FROM categories WHERE user_name = ?", (user_name,))
+    cursor.execute(CATEGORY_NAMES_QUERY, (user_id,))
     categories = [row[0] for row in cursor.fetchall()]
-    connection.close()
     
-    if request.method == 'POST':
-        selected_categories = request.form.getlist('categories')
+    # Raportul este cerut din formular (POST) sau din linkurile de paginare (GET, aceiasi parametri in URL)
+    if request.method == 'POST' or 'start_date' in request.args:
+        selected_categories = request.values.getlist('categories')
         
         # Verifica ca s-a selectat macar o categorie de cheltuieli
         if len(selected_categories) == 0:
             flash('Please select minimum one category. Please try again.', 'error')
-            return redirect(url_for('reports')) 
+            return redirect(url_for('main.reports')) 
         
         # Verificare corectitudine interval de timp: start_date anterior end_date
-        start_date = request.form['start_date']
-        end_date = request.form['end_date']
+        start_date = request.values['start_date']
+        end_date = request.values['end_date']
 
         if not validate_date_range(start_date, end_date):
             flash('Invalid date range. Please try again.', 'error')
-            return redirect(url_for('reports'))
+            return redirect(url_for('main.reports'))
+
+        # Sortare si dimensiunea paginii (limitata la MAX_PAGE_SIZE)
+        sort = request.values.get('sort', 'date')
+        if sort not in report_pages.SORT_KEYS:
+            sort = 'date'
+        order = 'desc' if request.values.get('order') == 'desc' else 'asc'
+        page_size = request.values.get('page_size', current_app.config['REPORT_PAGE_SIZE'], type=int)
+        page_size = min(max(page_size, 1), report_pages.MAX_PAGE_SIZE)
+
+        # Doar pagina ceruta este citita din baza de date; totalurile vin din interogari agregate
+        page = report_pages.fetch_page(connection, user_id, selected_categories, start_date, end_date, sort, order == 'desc', page_size,
+                                       after=report_pages.parse_cursor(request.args.get('after'), sort),
+                                       before=report_pages.parse_cursor(request.args.get('before'), sort))
+        totals = report_pages.report_totals(connection, user_id, selected_categories, start_date, end_date)
+
+        query = {'categories': selected_categories, 'start_date': start_date, 'end_date': end_date,
+                 'sort': sort, 'order': order, 'page_size': page_size}
+        return render_template('reports.html', categories= categories, expenses=page['expenses'], start_date=start_date, end_date=end_date,
+                               page=page, totals=totals, query=query)
+        
+    return render_template('reports.html', categories= categories, expenses=[])
 
-        # Construim o interogare SQL pentru a obtine cheltuielile doar pentru categoriile selectate
-        query = "SELECT * FROM expenses WHERE user_name=? AND amount>0 AND date BETWEEN ? AND ?"
-        params = [user_name, start_date, end_date]
+# Parametrii unui raport agregat (perioada, interval, categorii) din URL; intoarce None daca sunt invalizi
+def rollup_params():
+    period = request.args.get('period', 'month')
+    start_date = request.args.get('start_date', '')
+    end_date = request.args.get('end_date', '')
+    if period not in rollups.PERIODS or not validate_date_range(start_date, end_date):
+        return None
+    return period, start_date, end_date, request.args.getlist('categories')
 
-        if selected_categories:
-            placeholders = ','.join(['?'] * len(selected_categories))
-            query += f" AND category_name IN ({placeholders})"
-            params.extend(selected_categories)
 
-        # Executare interogare si obtinere rezultate
-        connection = sqlite3.connect('database.db')
-        cursor = connection.cursor()
-        cursor.execute(query, params)
-        expenses = cursor.fetchall()
-        connection.close()
-        
-        return render_template('reports.html', categories= categories, expenses=expenses, start_date=start_date, end_date=end_date)
-        
-    return render_template('reports.html', categories= categories, expenses=[])
+# Ruta care intoarce cheltuielile pe categorie si zi / saptamana / luna in format JSON
+@bp.route('/api/rollups')
+def rollup_data():
+    if 'user_id' not in session:
+        return jsonify({'error': 'Please log in first'}), 401
+
+    params = rollup_params()
+    if params is None:
+        return jsonify({'error': 'Invalid period or date range'}), 400
+
+    user_id = session['user_id']
+    rollup = rollups.fetch_rollup(get_db(), user_id, *params)
+    rollup['series'] = {category_name: [money.to_units(total) for total in series]
+                        for category_name, series in rollup['series'].items()}
+    rollup['bucket_totals'] = [money.to_units(total) for total in rollup['bucket_totals']]
+    return jsonify(rollup)
+
+
+# Ruta pentru pagina cu evolutia cheltuielilor (totaluri pe zi, saptamana sau luna)
+@bp.route('/reports/trends')
+def trends():
+    if 'user_id' not in session:
+        flash('Please log in first', 'error')
+        return redirect(url_for('main.login'))
+
+    user_id = session['user_id']
+    categories = [category[2] for category in get_expense_categories(user_id)]
+
+    rollup = None
+    if 'start_date' in request.args:
+        params = rollup_params()
+        if params is None:
+            flash('Invalid date range. Please try again.', 'error')
+            return redirect(url_for('main.trends'))
+        rollup = rollups.fetch_rollup(get_db(), user_id, *params)
+
+    return render_template('trends.html', categories=categories, rollup=rollup, periods=list(rollups.PERIODS),
+                           selected=request.args.getlist('categories'), period=request.args.get('period', 'month'),
+                           start_date=request.args.get('start_date', ''), end_date=request.args.get('end_date', ''))
+
+
+# Cautare in descrierile cheltuielilor cu parametrii din URL (text, categorii, interval optional, pagina)
+def run_search(user_id):
+    start_date = request.args.get('start_date') or None
+    end_date = request.args.get('end_date') or None
+    if (start_date or end_date) and not validate_date_range(start_date, end_date):
+        return None
+    return search.search_expenses(get_db(), user_id, request.args.get('q', ''), request.args.getlist('categories'),
+                                  start_date, end_date, request.args.get('page', 1, type=int),
+                                  current_app.config['REPORT_PAGE_SIZE'])
+
+
+# Ruta care intoarce rezultatele cautarii in format JSON
+@bp.route('/api/search')
+def search_data():
+    if 'user_id' not in session:
+        return jsonify({'error': 'Please log in first'}), 401
+
+    user_id = session['user_id']
+    results = run_search(user_id)
+    if results is None:
+        return jsonify({'error': 'Invalid date range'}), 400
+
+    results['expenses'] = [dict(zip(('id', 'user_name', 'amount', 'date', 'description', 'category_name'),
+                                    (expense[0], expense[1], money.to_units(expense[2]), *expense[3:])))
+                           for expense in results['expenses']]
+    return jsonify(results)
+
+
+# Ruta pentru pagina de cautare a cheltuielilor dupa descriere
+@bp.route('/search')
+def search_page():
+    if 'user_id' not in session:
+        flash('Please log in first', 'error')
+        return redirect(url_for('main.login'))
+
+    user_id = session['user_id']
+    categories = [category[2] for category in get_expense_categories(user_id)]
+
+    results = None
+    if request.args.get('q'):
+        results = run_search(user_id)
+        if results is None:
+            flash('Invalid date range. Please try again.', 'error')
+            return redirect(url_for('main.search_page'))
+
+    query = {'q': request.args.get('q', ''), 'categories': request.args.getlist('categories'),
+             'start_date': request.args.get('start_date', ''), 'end_date': request.args.get('end_date', '')}
+    return render_template('search.html', categories=categories, results=results, query=query)
+
+
+# Job in fundal: export CSV pentru un interval lung, scris direct intr-un fisier
+def run_export_job(connection, progress, user_id, user_name, start_date, end_date, export_path, extension, compress=False):
+    if extension == '.csv':
+        count = write_export(connection, export_path, user_id, user_name, start_date, end_date, compress, progress)
+    else:
+        count = columnar.write_export(connection, export_path, extension, user_id, user_name, start_date, end_date)
+        progress(count)
+    return f'{count} expenses exported.'
+
+
+# Import fisier incarcat, dupa extensie: CSV (citit rand cu rand) sau .npz / .parquet (citit ca vectori).
+# commit_each_batch: fiecare lot este salvat separat (importurile mari, din joburi in fundal)
+def import_file(connection, user_id, user_name, upload, extension, progress=None, commit_each_batch=False):
+    if extension == '.csv':
+        return import_expenses(connection, user_id, user_name, read_rows(upload), progress=progress,
+                               commit_each_batch=commit_each_batch)
+    columns = columnar.READERS[extension](upload)
+    return import_expenses(connection, user_id, user_name, columnar.iter_rows(columns), progress=progress,
+                           parse_row=columnar.parse_typed_row, commit_each_batch=commit_each_batch)
+
+
+# Job in fundal: import fisier salvat pe disc (fisierul este sters dupa import). Fiecare lot este o tranzactie
+# separata, deci cererile celorlalti utilizatori nu asteapta (si nu primesc 503) pe durata importului.
+def run_import_job(connection, progress, user_id, user_name, upload_path, extension='.csv'):
+    try:
+        with open(upload_path, 'rb') as upload:
+            report = import_file(connection, user_id, user_name, upload, extension, progress, commit_each_batch=True)
+    finally:
+        os.remove(upload_path)
+    service('chart_cache').invalidate(user_id)
+
+    message = f"{report['imported']} expenses added, {len(report['rejected'])} rows rejected ({report['rows_per_second']:.0f} rows/s)."
+    for line_number, reason in report['rejected'][:10]:
+        message += f' Line {line_number}: {reason}.'
+    return message
+
+
+# Raspuns pentru un job pornit: id-ul jobului (pentru clientii JSON) sau pagina de urmarire a progresului
+def job_started(job_id):
+    if request.accept_mimetypes.best == 'application/json':
+        return jsonify({'job_id': job_id, 'status_url': url_for('main.job_status', job_id=job_id)}), 202
+    return redirect(url_for('main.job_page', job_id=job_id))
+
+
+# Ruta pentru pagina de urmarire a unui job
+@bp.route('/jobs/<int:job_id>')
+def job_page(job_id):
+    if 'user_id' not in session:
+        flash('Please log in first', 'error')
+        return redirect(url_for('main.login'))
+
+    job = service('job_queue').get(get_db(), job_id, session['user_id'])
+    if job is None:
+        flash('Job not found', 'error')
+        return redirect(url_for('main.dashboard'))
+
+    return render_template('job.html', job=job)
+
+
+# Ruta care intoarce starea unui job in format JSON
+@bp.route('/api/jobs/<int:job_id>')
+def job_status(job_id):
+    if 'user_id' not in session:
+        return jsonify({'error': 'Please log in first'}), 401
+
+    job = service('job_queue').get(get_db(), job_id, session['user_id'])
+    if job is None:
+        return jsonify({'error': 'Job not found'}), 404
+
+    job.pop('file_path')
+    if job['kind'] == 'export' and job['status'] == 'done':
+        job['download_url'] = url_for('main.job_download', job_id=job_id)
+    return jsonify(job)
+
+
+# Ruta pentru descarcarea fisierului generat de un job de export
+@bp.route('/jobs/<int:job_id>/download')
+def job_download(job_id):
+    if 'user_id' not in session:
+        flash('Please log in first', 'error')
+        return redirect(url_for('main.login'))
+
+    user_name = find_user_name(session['user_id'])
+    job = service('job_queue').get(get_db(), job_id, session['user_id'])
+    if job is None or job['kind'] != 'export' or job['status'] != 'done' or not os.path.exists(job['file_path']):
+        flash('Export file is not available', 'error')
+        return redirect(url_for('main.export_csv'))
+
+    extension = '.csv.gz' if job['file_path'].endswith('.gz') else os.path.splitext(job['file_path'])[1]
+    return send_file(os.path.abspath(job['file_path']), as_attachment=True, download_name=f'report_{user_name}_job{job_id}{extension}')
+
 
 # Ruta pentru pagina de export in formmat csv a datelor din baza de date
-@app.route('/export_csv', methods=['GET', 'POST'])
+@bp.route('/export_csv', methods=['GET', 'POST'])
 def export_csv():
     if 'user_id' not in session:
         flash('Please log in first', 'error')
-        return redirect(url_for('login'))
+        return redirect(url_for('main.login'))
 
     if request.method == 'POST':
         start_date = request.form['start_date']
@@ -642,58 +1049,46 @@ def export_csv():
     
         if not validate_date_range(start_date, end_date):
            flash('Invalid date range. Please try again.', 'error')
-           return redirect(url_for('export_csv'))
+           return redirect(url_for('main.export_csv'))
 
         user_id = session['user_id']
         user_name = find_user_name(user_id)
-
-        connection = sqlite3.connect('database.db')
-        cursor = connection.cursor()
-           
-        # Selecteaza cheltuielile pentru intervalul specificat
-        cursor.execute('SELECT user_name, amount, date, description, category_name FROM expenses WHERE user_name=? AND amount>0 AND date BETWEEN ? AND ? ORDER BY date', (user_name, start_date, end_date))
-        expenses = cursor.fetchall()
-    
-        connection.close()
-
-        # Obtine directorul curent
-        current_directory = os.getcwd()
-
-        # Stabileste numele fisierului CSV  
-        csv_file_name = "report_"+ user_name + "_" + start_date + "_" + end_date + ".csv"
-        # Construieste calea la un fisier in directorul curent
-        csv_file_path = os.path.join(current_directory, csv_file_name)
-
-        # Creaza un fisier CSV in memoria temporara
-        csv_data = [['User', 'Amount', 'Date', 'Description', 'Category']]
-
-        for expense in expenses:
-            # Expense[2] reprezinta data in formatul 'YYYY-MM-DD'
-            date_str = expense[2]
-            date_obj = datetime.strptime(date_str, '%Y-%m-%d')
-            formatted_date = date_obj.strftime('%Y-%m-%d')
-
-            # Creează o nouă tupla cu datele formatate
-            formatted_expense = tuple(expense[:2]) + (formatted_date,) + tuple(expense[3:])
-
-            # Adaugă linia în csv_data
-            csv_data.append(formatted_expense)
-        
-        with open(csv_file_path, 'w', newline='') as csv_file:
-             csv_writer = csv.writer(csv_file)
-             csv_writer.writerows(csv_data)
-
-        # Trimite fisierul catre utilizator pentru a-l descarca
-        return send_file(csv_file_path, as_attachment=True, download_name=csv_file_name)  
-    return render_template('export_csv.html', expenses=[])
+        export_format = request.form.get('format', '.csv')
+        formats = columnar.export_formats()
+        if export_format not in formats:
+            flash('Export format is not available.', 'error')
+            return redirect(url_for('main.export_csv'))
+        compress = export_format == '.csv' and 'gzip' in request.form
+        extension = '.csv.gz' if compress else export_format
+
+        # Intervalele lungi sunt exportate in fundal; fisierul se descarca din pagina jobului
+        if (datetime.strptime(end_date, '%Y-%m-%d') - datetime.strptime(start_date, '%Y-%m-%d')).days > current_app.config['JOB_EXPORT_DAYS']:
+            export_path = service('job_queue').new_file('export', extension)
+            job_id = service('job_queue').submit(get_db(), user_id, 'export', run_export_job, user_id, user_name, start_date, end_date, export_path, export_format, compress, file_path=export_path)
+            return job_started(job_id)
+
+        # Formatele columnare (.npz, .parquet) contin vectori tipizati pentru amount si date
+        if export_format != '.csv':
+            export_file = columnar.export_bytes(get_db(), export_format, user_id, user_name, start_date, end_date)
+            return send_file(export_file, mimetype=formats[export_format], as_attachment=True,
+                             download_name="report_"+ user_name + "_" + start_date + "_" + end_date + export_format)
+
+        # Fisierul CSV este trimis in flux, pe masura ce randurile sunt citite din baza de date,
+        # fara a fi pastrat in memorie sau scris pe disc (in contextul cererii, deci din baza de date a aplicatiei)
+        csv_file_name = "report_"+ user_name + "_" + start_date + "_" + end_date + extension
+        response = Response(stream_with_context(stream_export(user_id, user_name, start_date, end_date, compress)),
+                            mimetype='application/gzip' if compress else 'text/csv')
+        response.headers['Content-Disposition'] = f'attachment; filename="{csv_file_name}"'
+        return response
+    return render_template('export_csv.html', expenses=[], formats=columnar.export_formats())
 
 
 # Ruta pentru pagina de import in format csv a datelor in baza de date
-@app.route('/import_csv', methods=['GET', 'POST'])
+@bp.route('/import_csv', methods=['GET', 'POST'])
 def import_csv():
     if 'user_id' not in session:
         flash('Please log in first', 'error')
-        return redirect(url_for('login'))
+        return redirect(url_for('main.login'))
 
     user_id = session['user_id']
     user_name = find_user_name(user_id)
@@ -704,60 +1099,51 @@ def import_csv():
 
             if csv_file.filename == '':
                 flash('No file selected', 'error')
-                return redirect(url_for('import_csv'))
-
-                
-            if csv_file and csv_file.filename.endswith('.csv'):
-                # Citirea datelor din fisierul CSV
-                # Deschiderea fișierului CSV în modul text
-                csv_data = csv.reader(csv_file.stream.read().decode('utf-8').splitlines())
-                                
-                # Deschiderea conexiunii la baza de date
-                connection = sqlite3.connect('database.db')
-                cursor = connection.cursor()
-                
-                for row in csv_data:
-                    user_name, amount, date, description, category_name = row
-                    date_str = row[2]
-                    #date = datetime.strptime(date_str, '%Y-%m-%d')
-                    date = date_str
-                    # Adaugarea datelor in baza de date
-                    if (add_expense(user_name, amount, date, description, category_name) == 0):
-                        flash('Expense not imported for {category_name}. Exceed budget!', 'warning')
-                connection.commit()
-                connection.close()
-
-                flash('CSV file imported successfully!')
-                return redirect(url_for('import_csv'))
+                return redirect(url_for('main.import_csv'))
+
+            extension = os.path.splitext(csv_file.filename)[1].lower()
+            if csv_file and extension in columnar.export_formats():
+                # Fisierele mari sunt salvate pe disc si importate in fundal
+                if request.content_length and request.content_length > current_app.config['JOB_IMPORT_THRESHOLD']:
+                    upload_path = service('job_queue').new_file('import', extension)
+                    csv_file.save(upload_path)
+                    job_id = service('job_queue').submit(get_db(), user_id, 'import', run_import_job, user_id, user_name, upload_path, extension)
+                    return job_started(job_id)
+
+                # Fisierul este citit si validat pe masura ce este importat, intr-o singura tranzactie
+                report = import_file(get_db(), user_id, user_name, csv_file.stream, extension)
+                service('chart_cache').invalidate(user_id)
+
+                flash(f"File imported: {report['imported']} expenses added, {len(report['rejected'])} rows rejected "
+                      f"({report['seconds']:.2f} s, {report['rows_per_second']:.0f} rows/s).")
+                return render_template('import_csv.html', rejected=report['rejected'], extensions=list(columnar.export_formats()))
 
             else:
-                flash('Invalid file format. Please select a CSV file.', 'error')
-                return redirect(url_for('import_csv'))
+                flash(f"Invalid file format. Please select a {' / '.join(columnar.export_formats())} file.", 'error')
+                return redirect(url_for('main.import_csv'))
 
         except Exception as e:
             flash(f'An error occurred: {str(e)}', 'error')
-            return redirect(url_for('import_csv'))
+            return redirect(url_for('main.import_csv'))
 
-    return render_template('import_csv.html')
+    return render_template('import_csv.html', extensions=list(columnar.export_formats()))
 
 # Ruta pentru pagina de setari
-@app.route('/settings', methods=['GET', 'POST'])
+@bp.route('/settings', methods=['GET', 'POST'])
 def settings():
 
     if 'user_id' not in session:
         flash('Please log in first', 'error')
-        return redirect(url_for('login'))
+        return redirect(url_for('main.login'))
 
     # Preia vechile valori din baza de date
     user_id = session['user_id']
-    user_name = find_user_name(user_id)
 
-    connection = sqlite3.connect('users.db')
+    connection = get_db()
     cursor = connection.cursor()
-    cursor.execute('SELECT * FROM users WHERE user_name=? ', (user_name,))
+    cursor.execute('SELECT * FROM users WHERE id=? ', (user_id,))
     user_data = cursor.fetchone()
     old_email = user_data[3]
-    connection.close()
 
     if request.method == 'POST':
         # Acceseaza valorile din formular
@@ -769,40 +1155,44 @@ def settings():
         # Verifica parola noua cu cea confirmata 
         if new_password != confirm_new_password:
             flash('New password is missmatched', 'error')
-            return redirect(url_for('settings'))
+            return redirect(url_for('main.settings'))
 
-        connection = sqlite3.connect('users.db')
+        connection = get_db()
         cursor = connection.cursor()
 
-        cursor.execute('SELECT * FROM users WHERE user_name=? ', (user_name,))
+        cursor.execute('SELECT * FROM users WHERE id=? ', (user_id,))
         existing_password = cursor.fetchone()[2]
 
-        # Verifica parola curenta 
-        current_password_hash = generate_hash(current_password)
-        if  check_password(current_password_hash, existing_password):  
-            flash('Current password is incorrect', 'error')
-            return redirect(url_for('settings'))
-
-        # Actualizeaza setarile in baza de date
-        password_hash = generate_hash(new_password) 
-        cursor.execute('UPDATE users SET email = ?, password = ? WHERE user_name = ?', (email, password_hash, user_name))
+        try:
+            # Verifica parola curenta 
+            if not check_password(current_password, existing_password):
+                flash('Current password is incorrect', 'error')
+                return redirect(url_for('main.settings'))
+
+            # Actualizeaza setarile in baza de date (parola ramane aceeasi daca nu a fost introdusa una noua)
+            password_hash = generate_hash(new_password) if new_password else existing_password
+        except HasherBusy:
+            flash('Server is busy, please try again in a moment.', 'error')
+            return redirect(url_for('main.settings'))
+        cursor.execute('UPDATE users SET email = ?, password = ? WHERE id = ?', (email, password_hash, user_id))
 
         connection.commit()
-        connection.close()
+        # Identitatea pastrata in sesiune este recitita din baza de date la urmatoarea cerere
+        forget_user()
 
         flash('Settings saved successfully', 'success')
-        return redirect(url_for('settings'))
+        return redirect(url_for('main.settings'))
 
     return render_template('settings.html', old_email=old_email)
 
 
 # Ruta pentru pagina de delogare
-@app.route('/logout')
+@bp.route('/logout')
 def logout():
     session.pop('user_id', None)
-    delete_image_files()
+    forget_user()
     flash('Logged out successfully', 'success')
-    return redirect(url_for('index'))
+    return redirect(url_for('main.index'))
     
 if __name__ == '__main__':
-    app.run(host='0.0.0.0', port=5000, debug=True, threaded=True) 
+    create_app().run(host='0.0.0.0', port=5000, debug=True, threaded=True) 
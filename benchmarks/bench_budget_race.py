@@ -0,0 +1,176 @@
+# Test de stres pentru verificarea bugetului: --processes procese (ca workerii unui server), fiecare cu
+# --threads fire, trimit in acelasi timp --expenses cheltuieli prin /expense_form catre aceeasi categorie.
+# Bugetul ajunge doar pentru o parte din ele (implicit jumatate). La final se verifica faptul ca suma
+# salvata nu depaseste bugetul, ca fiecare cheltuiala acceptata a fost salvata, ca nicio cheltuiala nu a fost
+# respinsa cat timp mai era loc in buget si ca totalurile (category_totals, daily_totals) sunt corecte.
+# Se afiseaza debitul (cereri pe secunda) si latenta p50/p95/p99.
+#
+# Rulare: python benchmarks/bench_budget_race.py [--processes 4] [--threads 8] [--expenses 4000]
+#                                                [--amount 1.25] [--budget 2500.00]
+import argparse
+import multiprocessing
+import os
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import db
+import money
+import passwords
+
+PASSWORD = 'bench-password'
+EMAIL = 'race@example.com'
+CATEGORY = 'Race'
+
+# Hash ieftin pentru utilizatorul de test: se masoara scrierea cheltuielilor, nu autentificarea
+CONFIG = {'TESTING': True, 'PASSWORD_HASH_METHOD': 'pbkdf2_sha256', 'PASSWORD_PBKDF2_ITERATIONS': 1000}
+
+
+def seed(path, budget_cents):
+    with db.connection(path) as conn:
+        db.create_schema(conn)
+        password_hash = passwords.hash_password(PASSWORD, 'pbkdf2_sha256', iterations=1000)
+        user_id = conn.execute('INSERT INTO users (user_name, password, email) VALUES (?, ?, ?)',
+                               ('race', password_hash, EMAIL)).lastrowid
+        conn.execute('INSERT INTO categories (user_id, category_name) VALUES (?, ?)', (user_id, CATEGORY))
+        conn.execute('INSERT INTO budgets (user_id, category_name, budget_amount_cents, budget_threshold_percentage) '
+                     'VALUES (?, ?, ?, ?)', (user_id, CATEGORY, budget_cents, 80))
+        conn.commit()
+
+
+# Un proces de lucru: propria aplicatie Flask (deci propriul pool de conexiuni), cate un client autentificat
+# pe fir; toate procesele pornesc trimiterea abia dupa ce sunt toate pregatite (start).
+def worker(database, workdir, process_number, threads, count, amount, ready, start):
+    os.chdir(workdir)
+    from app import create_app
+
+    app = create_app({**CONFIG, 'DATABASE': database})
+    clients = []
+    for _ in range(threads):
+        client = app.test_client()
+        if client.post('/login', data={'email': EMAIL, 'password': PASSWORD}).status_code != 302:
+            raise SystemExit('login failed')
+        clients.append(client)
+
+    statuses = {}
+    latencies = []
+    lock = threading.Lock()
+
+    def run(slot):
+        client = clients[slot]
+        for index in range(slot, count, threads):
+            started = time.perf_counter()
+            response = client.post('/expense_form', data={'amount': amount, 'date': '2024-06-01',
+                                                          'description': f'Race {process_number}-{index}',
+                                                          'category': CATEGORY})
+            elapsed = time.perf_counter() - started
+            with lock:
+                statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+                latencies.append(elapsed)
+
+    ready.put(process_number)
+    start.wait()
+    runners = [threading.Thread(target=run, args=(slot,)) for slot in range(threads)]
+    for runner in runners:
+        runner.start()
+    for runner in runners:
+        runner.join()
+    return statuses, latencies
+
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, round(fraction * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Concurrent expenses against one budget')
+    parser.add_argument('--processes', type=int, default=4)
+    parser.add_argument('--threads', type=int, default=8, help='threads per process')
+    parser.add_argument('--expenses', type=int, default=4000, help='total expenses sent')
+    parser.add_argument('--amount', default='1.25')
+    parser.add_argument('--budget', help='budget for the category (default: room for half of the expenses)')
+    args = parser.parse_args()
+
+    amount_cents = money.to_cents(args.amount)
+    budget_cents = money.to_cents(args.budget) if args.budget else amount_cents * (args.expenses // 2)
+    capacity = budget_cents // amount_cents
+
+    with tempfile.TemporaryDirectory() as workdir:
+        database = os.path.join(workdir, 'race.db')
+        seed(database, budget_cents)
+        db.close_all()
+
+        context = multiprocessing.get_context('spawn')
+        manager = context.Manager()
+        ready = manager.Queue()
+        start = manager.Event()
+        counts = [args.expenses // args.processes + (number < args.expenses % args.processes)
+                  for number in range(args.processes)]
+
+        with ProcessPoolExecutor(args.processes, mp_context=context) as pool:
+            futures = [pool.submit(worker, database, workdir, number, args.threads, counts[number], args.amount,
+                                   ready, start)
+                       for number in range(args.processes)]
+            for _ in range(args.processes):
+                ready.get()
+            started = time.perf_counter()
+            start.set()
+            results = [future.result() for future in futures]
+            wall = time.perf_counter() - started
+        manager.shutdown()
+
+        statuses = {}
+        latencies = []
+        for process_statuses, process_latencies in results:
+            for status, count in process_statuses.items():
+                statuses[status] = statuses.get(status, 0) + count
+            latencies.extend(process_latencies)
+        latencies.sort()
+
+        conn = sqlite3.connect(database)
+        spent, saved = conn.execute("SELECT COALESCE(SUM(amount_cents), 0), COUNT(*) FROM expenses "
+                                    "WHERE category_name = ? AND description LIKE 'Race %'", (CATEGORY,)).fetchone()
+        mismatches = db.verify_totals(conn)
+        conn.close()
+
+    accepted = statuses.get(302, 0)
+    rejected = statuses.get(200, 0)
+    busy = statuses.get(503, 0)
+    other = sum(count for status, count in statuses.items() if status not in (200, 302, 503))
+
+    print(f'{args.expenses} expenses of {money.format_cents(amount_cents)} from {args.processes} processes x '
+          f'{args.threads} threads against a budget of {money.format_cents(budget_cents)} (room for {capacity})')
+    print(f'accepted {accepted}, rejected {rejected}, busy {busy}, other {other}')
+    print(f'spent {money.format_cents(spent)} in {saved} expenses')
+    print('%9s %9s %9s %9s' % ('req/s', 'p50 ms', 'p95 ms', 'p99 ms'))
+    print('%9.1f %9.1f %9.1f %9.1f' % (args.expenses / wall, percentile(latencies, 0.50) * 1000,
+                                       percentile(latencies, 0.95) * 1000, percentile(latencies, 0.99) * 1000))
+
+    failures = []
+    if spent > budget_cents:
+        failures.append(f'budget exceeded: spent {money.format_cents(spent)} > {money.format_cents(budget_cents)}')
+    if saved != accepted:
+        failures.append(f'{accepted} expenses accepted but {saved} saved')
+    if rejected and spent + amount_cents <= budget_cents:
+        failures.append(f'{rejected} expenses rejected while the budget still had room')
+    if other:
+        failures.append(f'{other} unexpected responses: {statuses}')
+    if mismatches:
+        failures.append(f'{len(mismatches)} category/daily totals differ from the expenses table')
+    for failure in failures:
+        print(f'FAIL {failure}')
+    if failures:
+        raise SystemExit(1)
+    print('Budget was never exceeded.')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,93 @@
+# Micro-benchmark: timpul de generare a diagramei de pe dashboard in functie de numarul de categorii.
+# Compara varianta veche (cate trei apeluri bar() si text() pentru fiecare categorie) cu render_chart
+# (un singur PolyCollection construit din vectori NumPy pentru fiecare serie).
+#
+# Rulare: python benchmarks/bench_chart_render.py [--repeat 5] [--counts 5,10,25,50,100,200]
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from chart_renderer import render_chart
+
+
+# Varianta anterioara, pastrata doar pentru comparatie
+def render_chart_loop(data, image_path):
+    from matplotlib.figure import Figure
+
+    categories = data['categories']
+    expenses = data['expenses']
+    budgets = data['budgets']
+    thresholds = data['thresholds']
+
+    bar_width = 0.2
+
+    fig = Figure()
+    ax = fig.subplots()
+
+    for i, (budget, threshold, expense) in enumerate(zip(budgets, thresholds, expenses)):
+        ax.bar(i, float(budget), bar_width, label='Budget Value' if i == 0 else '', color='green')
+        ax.bar(i + bar_width, float(threshold), bar_width, label='Threshold Value' if i == 0 else '', color='orange')
+        ax.bar(i + (2 * bar_width), float(expense[1]), bar_width, label='Total Expenses' if i == 0 else '', color='red')
+        ax.text(i, budget + 5, str(budget), ha='center', va='bottom', rotation='horizontal')
+        ax.text(i + bar_width, threshold + 5, str(threshold), ha='center', va='bottom', rotation='horizontal')
+        ax.text(i + (2 * bar_width), expense[1] + 5, str(expense[1]), ha='center', va='bottom', rotation='horizontal')
+
+    ax.set_xticks(range(len(categories)))
+    ax.set_xticklabels([category[2] for category in categories])
+    ax.legend()
+
+    fig.savefig(image_path)
+    return image_path
+
+
+# Date sintetice in formatul intors de get_chart_data (sume in subunitati)
+def make_data(count):
+    data = {'categories': [], 'expenses': [], 'budgets': [], 'thresholds': []}
+    for i in range(count):
+        name = 'Category %d' % i
+        budget = 100000 + i * 1000
+        data['categories'].append((i + 1, 'bench', name))
+        data['expenses'].append((name, budget * 6 // 10))
+        data['budgets'].append(budget)
+        data['thresholds'].append(budget * 8 // 10)
+    return data
+
+
+def measure(render, data, image_path, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        render(data, image_path)
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Dashboard chart render time by number of categories')
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--counts', default='5,10,25,50,100,200')
+    args = parser.parse_args()
+
+    counts = [int(count) for count in args.counts.split(',')]
+
+    with tempfile.TemporaryDirectory() as directory:
+        image_path = os.path.join(directory, 'chart.png')
+
+        # Prima generare incarca fonturile si backend-ul; nu este inclusa in masuratori
+        render_chart(make_data(1), image_path)
+
+        print('%10s %12s %14s %8s' % ('categories', 'loop (ms)', 'vectorized (ms)', 'speedup'))
+        for count in counts:
+            data = make_data(count)
+            before = measure(render_chart_loop, data, image_path, args.repeat)
+            after = measure(render_chart, data, image_path, args.repeat)
+            print('%10d %12.1f %14.1f %7.2fx' % (count, before * 1000, after * 1000, before / after))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,95 @@
+# Micro-benchmark: timpul de incarcare a unui an de cheltuieli din fisierul exportat.
+# Compara citirea fisierului CSV (csv.reader + float/strptime pentru fiecare rand) cu
+# arhiva .npz (vectori tipizati) si, daca pyarrow este instalat, cu fisierul .parquet.
+#
+# Rulare: python benchmarks/bench_columnar.py [--rows 100000] [--repeat 5]
+import argparse
+import csv
+import io
+import os
+import random
+import statistics
+import sys
+import time
+from datetime import date, datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import columnar
+from csv_export import iter_csv
+from money import format_cents
+
+
+# Date sintetice in formatul intors de iter_expenses cu COLUMNS_QUERY (un an, in ordinea datei, sume in subunitati)
+def make_rows(count):
+    start = date(2024, 1, 1)
+    rows = []
+    for i in range(count):
+        day = start + timedelta(days=i * 366 // count)
+        rows.append(('bench', random.randint(100, 50000), day.isoformat(), 'Expense %d' % i, 'Category %d' % (i % 10)))
+    return rows
+
+
+def to_columns(rows):
+    import numpy as np
+
+    user_names, amounts, dates, descriptions, category_names = zip(*rows)
+    return {
+        'user_name': np.array(user_names, dtype=str),
+        'amount_cents': np.array(amounts, dtype=np.int64),
+        'date': np.array(dates, dtype='datetime64[D]'),
+        'description': np.array(descriptions, dtype=str),
+        'category_name': np.array(category_names, dtype=str),
+    }
+
+
+# Incarcare CSV ca vectori amount/date, cum ar face un script de analiza
+def load_csv(data):
+    amounts = []
+    dates = []
+    reader = csv.reader(io.StringIO(data.decode('utf-8')))
+    next(reader)
+    for row in reader:
+        amounts.append(float(row[1]))
+        dates.append(datetime.strptime(row[2], '%Y-%m-%d').date())
+    return amounts, dates
+
+
+def measure(load, data, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        load(data)
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Load time of an exported year of expenses by file format')
+    parser.add_argument('--rows', type=int, default=100000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    rows = make_rows(args.rows)
+    columns = to_columns(rows)
+
+    # In CSV suma este scrisa ca text cu doua zecimale, ca in EXPORT_QUERY
+    csv_rows = [(user_name, format_cents(amount), *rest) for user_name, amount, *rest in rows]
+    files = {'.csv': b''.join(iter_csv([csv_rows]))}
+    for extension in columnar.export_formats():
+        if extension in columnar.WRITERS:
+            buffer = io.BytesIO()
+            columnar.WRITERS[extension](columns, buffer)
+            files[extension] = buffer.getvalue()
+
+    print('%10s %12s %10s' % ('format', 'size (KiB)', 'load (ms)'))
+    for extension, data in files.items():
+        if extension == '.csv':
+            seconds = measure(load_csv, data, args.repeat)
+        else:
+            seconds = measure(lambda data: columnar.READERS[extension](io.BytesIO(data)), data, args.repeat)
+        print('%10s %12d %10.1f' % (extension, len(data) // 1024, seconds * 1000))
+
+
+if __name__ == '__main__':
+    main()
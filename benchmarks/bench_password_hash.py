@@ -0,0 +1,66 @@
+# Micro-benchmark: costul unui hash de parola pentru fiecare factor de lucru si numarul de
+# login-uri pe secunda cand mai multe cereri verifica parole in acelasi timp prin PasswordHasher.
+# Se alege cel mai mare cost care pastreaza un login sub ~100 ms pe serverul real.
+#
+# Rulare: python benchmarks/bench_password_hash.py [--repeat 5] [--clients 8] [--logins 32]
+import argparse
+import hashlib
+import os
+import statistics
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import passwords
+from passwords import PasswordHasher
+
+
+def measure(func, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings)
+
+
+# Login-uri pe secunda: `clients` fire ale serverului verifica parole prin acelasi PasswordHasher
+def throughput(hasher, stored, clients, logins):
+    start = time.perf_counter()
+    with ThreadPoolExecutor(clients) as pool:
+        results = list(pool.map(lambda _: hasher.verify('bench-password', stored), range(logins)))
+    seconds = time.perf_counter() - start
+    assert all(results)
+    return logins / seconds
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Cost of password hashing per work factor')
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--clients', type=int, default=8)
+    parser.add_argument('--logins', type=int, default=32)
+    args = parser.parse_args()
+
+    settings = [('sha256 (legacy)', None)]
+    settings += [('scrypt n=2**%d' % exponent, {'method': 'scrypt', 'scrypt_n': 2 ** exponent}) for exponent in (13, 14, 15, 16)]
+    settings += [('pbkdf2 %d' % iterations, {'method': 'pbkdf2_sha256', 'iterations': iterations})
+                 for iterations in (210000, 600000)]
+
+    print('%18s %10s %16s' % ('method', 'hash (ms)', 'logins/s (%d w)' % passwords.HASH_WORKERS))
+    for name, options in settings:
+        if options is None:
+            seconds = measure(lambda: hashlib.sha256(b'bench-password').hexdigest(), args.repeat)
+            print('%18s %10.3f %16s' % (name, seconds * 1000, '-'))
+            continue
+        seconds = measure(lambda: passwords.hash_password('bench-password', **options), args.repeat)
+        stored = passwords.hash_password('bench-password', **options)
+        hasher = PasswordHasher(**options, queue=args.logins, wait=60)
+        rate = throughput(hasher, stored, args.clients, args.logins)
+        hasher.shutdown()
+        print('%18s %10.1f %16.1f' % (name, seconds * 1000, rate))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,351 @@
+# Test de incarcare pentru rutele aplicatiei: baza de date este populata cu utilizatori, categorii si
+# cheltuieli sintetice (reproductibil, din --seed), apoi fiecare ruta este apelata de --threads fire
+# (cate un client de test Flask autentificat pe fir). Pentru fiecare ruta se afiseaza latenta p50/p95/p99,
+# numarul de cereri pe secunda si memoria maxima (RSS) a procesului.
+#
+# Rezultatele pot fi salvate ca referinta (--save-baseline) si comparate la o rulare ulterioara (--compare):
+# comanda se termina cu eroare daca o ruta este mai lenta (p95) sau are un debit mai mic decat referinta,
+# peste toleranta data.
+#
+# Rulare: python benchmarks/bench_routes.py [--expenses 1000000] [--requests 200] [--threads 4]
+#                                           [--routes dashboard,reports] [--save-baseline FILE | --compare FILE]
+import argparse
+import io
+import json
+import os
+import queue
+import random
+import resource
+import sqlite3
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import db
+import passwords
+
+CATEGORIES = ['Utilitati', 'Diverse', 'Impozit', 'Transport', 'Mancare', 'Sanatate', 'Educatie', 'Vacanta']
+
+DESCRIPTIONS = ['Plata Engie', 'Abonament transport', 'Cumparaturi', 'Factura internet', 'Farmacie',
+                'Restaurant', 'Carti', 'Benzina', 'Impozit locuinta', 'Bilet avion']
+
+PASSWORD = 'bench-password'
+
+# Intervalul cheltuielilor generate si intervalul folosit in rapoarte si exporturi
+FIRST_DAY = date(2020, 1, 1)
+DAYS = 5 * 365
+REPORT_RANGE = ('2023-01-01', '2023-12-31')
+
+INSERT_BATCH = 50000
+
+# Numarul de cheltuieli trimise intr-o cerere expense_batch
+BATCH_SIZE = 50
+
+
+def user_email(number):
+    return f'bench{number}@example.com'
+
+
+# Populare baza de date: utilizatorii, categoriile si bugetele lor (suficient de mari pentru ca toate
+# cheltuielile sa fie acceptate) si cheltuielile, impartite egal intre utilizatori.
+def seed(path, users, expenses, seed_value):
+    rng = random.Random(seed_value)
+    with db.connection(path) as conn:
+        db.create_schema(conn)
+        password_hash = passwords.hash_password(PASSWORD)
+        for number in range(users):
+            cursor = conn.execute('INSERT INTO users (user_name, password, email) VALUES (?, ?, ?)',
+                                  (f'bench{number}', password_hash, user_email(number)))
+            user_id = cursor.lastrowid
+            for category_name in CATEGORIES:
+                conn.execute('INSERT INTO categories (user_id, category_name) VALUES (?, ?)',
+                             (user_id, f'{category_name} {number}'))
+                conn.execute('INSERT INTO budgets (user_id, category_name, budget_amount_cents, budget_threshold_percentage) '
+                             'VALUES (?, ?, ?, ?)', (user_id, f'{category_name} {number}', 10 ** 12, 80))
+
+        user_ids = [row[0] for row in conn.execute('SELECT id FROM users ORDER BY id')]
+        batch = []
+        for index in range(expenses):
+            number = index % users
+            batch.append((user_ids[number], rng.randint(100, 50000),
+                          (FIRST_DAY + timedelta(days=rng.randrange(DAYS))).isoformat(),
+                          rng.choice(DESCRIPTIONS), f'{rng.choice(CATEGORIES)} {number}'))
+            if len(batch) == INSERT_BATCH:
+                _insert(conn, batch)
+                batch = []
+        _insert(conn, batch)
+        conn.commit()
+
+
+def _insert(conn, batch):
+    conn.executemany('INSERT INTO expenses (user_id, amount_cents, date, description, category_name) VALUES (?, ?, ?, ?, ?)',
+                     batch)
+
+
+# Copie de lucru a bazei de date populate: rutele de scriere (expense_form, expense_batch, import_csv) modifica
+# doar copia, deci fiecare rulare porneste de la aceleasi date. Copia este facuta cu API-ul de backup SQLite
+# (include si paginile aflate inca in fisierul WAL); fisierele -wal / -shm ramase de la o rulare anterioara sunt sterse.
+def scratch_copy(seeded, scratch):
+    for suffix in ('', '-wal', '-shm'):
+        if os.path.exists(scratch + suffix):
+            os.remove(scratch + suffix)
+    source = sqlite3.connect(seeded)
+    target = sqlite3.connect(scratch)
+    try:
+        source.backup(target)
+    finally:
+        target.close()
+        source.close()
+
+
+# Cererile fiecarei rute: functie(client, numar utilizator, numar cerere) -> raspuns.
+# Fiecare fir are propriul client autentificat (cookie-urile de sesiune nu sunt partajate intre fire).
+def make_routes():
+    start_date, end_date = REPORT_RANGE
+
+    def login(client, number, index):
+        return client.post('/login', data={'email': user_email(number), 'password': PASSWORD})
+
+    def dashboard(client, number, index):
+        return client.get('/dashboard')
+
+    def expense_form(client, number, index):
+        return client.post('/expense_form', data={'amount': '1.50', 'date': '2024-06-01',
+                                                  'description': f'Bench {index}', 'category': f'Diverse {number}'})
+
+    # Acelasi numar de cheltuieli ca BATCH_SIZE cereri expense_form, intr-o singura cerere JSON
+    def expense_batch(client, number, index):
+        return client.post('/api/expenses/batch', json={'expenses': [
+            {'amount': '1.50', 'date': '2024-06-01', 'description': f'Bench {index} {row}', 'category': f'Diverse {number}'}
+            for row in range(BATCH_SIZE)]})
+
+    def reports(client, number, index):
+        return client.get('/reports', query_string={'categories': [f'{name} {number}' for name in CATEGORIES[:4]],
+                                                    'start_date': start_date, 'end_date': end_date})
+
+    def export_csv(client, number, index):
+        return client.post('/export_csv', data={'start_date': start_date, 'end_date': end_date, 'format': '.csv'})
+
+    def import_csv(client, number, index):
+        rows = ''.join(f'bench{number},2.25,2024-07-01,Import {index} {row},Transport {number}\n' for row in range(100))
+        data = ('User,Amount,Date,Description,Category\n' + rows).encode('utf-8')
+        return client.post('/import_csv', data={'csv_file': (io.BytesIO(data), 'bench.csv')},
+                           content_type='multipart/form-data')
+
+    return {
+        'login': login,
+        'dashboard': dashboard,
+        'expense_form': expense_form,
+        'expense_batch': expense_batch,
+        'reports': reports,
+        'export_csv': export_csv,
+        'import_csv': import_csv,
+    }
+
+
+# Memoria rezidenta curenta (Linux: /proc/self/statm); altfel maximul raportat de getrusage
+def current_rss():
+    try:
+        with open('/proc/self/statm') as file:
+            return int(file.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except OSError:
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+# Memoria maxima in timpul unei rute, citita periodic de un fir separat
+class RssSampler:
+    def __init__(self, interval=0.01):
+        self.interval = interval
+        self.peak = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self):
+        while not self._stop.is_set():
+            self.peak = max(self.peak, current_rss())
+            self._stop.wait(self.interval)
+
+    def __enter__(self):
+        self.peak = current_rss()
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        self.peak = max(self.peak, current_rss())
+
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, round(fraction * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+def run_route(clients, users, request, count):
+    latencies = []
+    errors = 0
+    lock = threading.Lock()
+    slots = queue.Queue()
+    for slot in range(len(clients)):
+        slots.put(slot)
+    local = threading.local()
+
+    def worker(index):
+        nonlocal errors
+        if not hasattr(local, 'slot'):
+            local.slot = slots.get()
+        number = local.slot % users
+        client = clients[local.slot]
+        started = time.perf_counter()
+        response = request(client, number, index)
+        # Raspunsurile transmise in flux (exporturile) sunt citite complet
+        response.get_data()
+        elapsed = time.perf_counter() - started
+        with lock:
+            latencies.append(elapsed)
+            if response.status_code >= 400:
+                errors += 1
+
+    with RssSampler() as sampler:
+        started = time.perf_counter()
+        with ThreadPoolExecutor(len(clients)) as pool:
+            list(pool.map(worker, range(count)))
+        wall = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        'requests': count,
+        'errors': errors,
+        'p50_ms': percentile(latencies, 0.50) * 1000,
+        'p95_ms': percentile(latencies, 0.95) * 1000,
+        'p99_ms': percentile(latencies, 0.99) * 1000,
+        'mean_ms': statistics.mean(latencies) * 1000,
+        'rps': count / wall,
+        'peak_rss_mb': sampler.peak / (1024 * 1024),
+    }
+
+
+# Comparare cu referinta: o ruta a regresat daca p95 a crescut sau debitul a scazut peste toleranta
+def compare(results, baseline, tolerance):
+    regressions = []
+    for name, result in results.items():
+        reference = baseline.get('routes', {}).get(name)
+        if reference is None:
+            continue
+        if result['p95_ms'] > reference['p95_ms'] * (1 + tolerance):
+            regressions.append(f"{name}: p95 {result['p95_ms']:.1f} ms > baseline {reference['p95_ms']:.1f} ms")
+        if result['rps'] < reference['rps'] * (1 - tolerance):
+            regressions.append(f"{name}: {result['rps']:.1f} req/s < baseline {reference['rps']:.1f} req/s")
+        if result['errors'] > reference.get('errors', 0):
+            regressions.append(f"{name}: {result['errors']} errors (baseline {reference.get('errors', 0)})")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Load test of the Flask routes on a seeded database')
+    parser.add_argument('--users', type=int, default=4)
+    parser.add_argument('--expenses', type=int, default=200000)
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--requests', type=int, default=100, help='requests per route')
+    parser.add_argument('--threads', type=int, default=4)
+    parser.add_argument('--routes', help='comma separated subset of: ' + ', '.join(make_routes()))
+    parser.add_argument('--workdir', help='keep the seeded database here and reuse it on the next run '
+                                          '(each run works on a fresh copy of it)')
+    parser.add_argument('--save-baseline', metavar='FILE')
+    parser.add_argument('--compare', metavar='FILE')
+    parser.add_argument('--tolerance', type=float, default=0.25, help='allowed regression (0.25 = 25%%)')
+    args = parser.parse_args()
+
+    routes = make_routes()
+    if args.routes:
+        unknown = set(args.routes.split(',')) - set(routes)
+        if unknown:
+            parser.error(f"unknown routes: {', '.join(sorted(unknown))}")
+        routes = {name: request for name, request in routes.items() if name in args.routes.split(',')}
+
+    save_baseline = os.path.abspath(args.save_baseline) if args.save_baseline else None
+    baseline = None
+    if args.compare:
+        with open(args.compare) as file:
+            baseline = json.load(file)
+
+    original_cwd = os.getcwd()
+    temporary = None
+    workdir = args.workdir
+    if workdir is None:
+        temporary = tempfile.TemporaryDirectory()
+        workdir = temporary.name
+    os.makedirs(workdir, exist_ok=True)
+    workdir = os.path.abspath(workdir)
+    seeded = os.path.join(workdir, f'bench_{args.users}_{args.expenses}_{args.seed}.db')
+    database = os.path.join(workdir, 'bench_run.db')
+
+    # Baza de date populata este refolosita de rularile urmatoare cu aceiasi parametri (--workdir);
+    # aplicatia lucreaza pe o copie noua la fiecare rulare
+    if not os.path.exists(seeded):
+        started = time.perf_counter()
+        seed(seeded, args.users, args.expenses, args.seed)
+        db.close_all()
+        print(f'Seeded {args.users} users and {args.expenses} expenses in {time.perf_counter() - started:.1f} s')
+    scratch_copy(seeded, database)
+
+    # Aplicatia ruleaza in directorul de lucru: imaginile diagramelor si fisierele joburilor raman acolo
+    os.chdir(workdir)
+    from app import create_app
+
+    app = create_app({'DATABASE': database, 'TESTING': True})
+    clients = []
+    for slot in range(args.threads):
+        client = app.test_client()
+        number = slot % args.users
+        response = client.post('/login', data={'email': user_email(number), 'password': PASSWORD})
+        if response.status_code != 302:
+            raise SystemExit(f'login failed for {user_email(number)}')
+        clients.append(client)
+
+    results = {}
+    print('%13s %8s %6s %9s %9s %9s %9s %9s' % ('route', 'requests', 'errors', 'p50 ms', 'p95 ms', 'p99 ms', 'req/s', 'RSS MiB'))
+    for name, request in routes.items():
+        # O cerere de incalzire (cache-uri, pool de conexiuni, procesele diagramelor) nu este masurata
+        request(clients[0], 0, -1).get_data()
+        result = run_route(clients, args.users, request, args.requests)
+        results[name] = result
+        print('%13s %8d %6d %9.1f %9.1f %9.1f %9.1f %9.1f' % (name, result['requests'], result['errors'], result['p50_ms'],
+                                                              result['p95_ms'], result['p99_ms'], result['rps'],
+                                                              result['peak_rss_mb']))
+
+    report = {
+        'settings': {'users': args.users, 'expenses': args.expenses, 'seed': args.seed,
+                     'requests': args.requests, 'threads': args.threads},
+        'routes': results,
+    }
+    if save_baseline:
+        with open(save_baseline, 'w') as file:
+            json.dump(report, file, indent=2, sort_keys=True)
+        print(f'Baseline saved to {save_baseline}')
+
+    os.chdir(original_cwd)
+    if temporary is not None:
+        temporary.cleanup()
+
+    if baseline is not None:
+        if baseline.get('settings') != report['settings']:
+            print('Warning: baseline was recorded with different settings', baseline.get('settings'))
+        regressions = compare(results, baseline, args.tolerance)
+        for line in regressions:
+            print(f'REGRESSION {line}')
+        if regressions:
+            raise SystemExit(1)
+        print('No regressions against the baseline.')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,68 @@
+# Micro-benchmark: timpul de pornire la rece (cold start) al aplicatiei, masurat in procese noi.
+# Pentru fiecare etapa (import flask, import app, create_app(), prima cerere) afiseaza mediana
+# si verifica faptul ca matplotlib / NumPy nu sunt importate la pornire.
+#
+# Rulare: python benchmarks/bench_startup.py [--repeat 10] [--max-ms 500]
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+HEAVY_MODULES = ('matplotlib', 'numpy', 'pyarrow')
+
+# Fiecare etapa ruleaza intr-un proces nou, deci importurile nu sunt reutilizate intre masuratori
+STAGES = {
+    'import flask': 'import flask',
+    'import app': 'import app',
+    'create_app()': 'import app; app.create_app()',
+    'first request': "import app; app.create_app().test_client().get('/login')",
+}
+
+PROBE = '''
+import json, sys, time
+start = time.perf_counter()
+exec(sys.argv[1])
+elapsed = time.perf_counter() - start
+print(json.dumps({'ms': elapsed * 1000, 'heavy': [name for name in sys.argv[2:] if name in sys.modules]}))
+'''
+
+
+def run_stage(code, directory):
+    env = dict(os.environ, PYTHONPATH=ROOT, PYTHONDONTWRITEBYTECODE='')
+    output = subprocess.run([sys.executable, '-c', PROBE, code, *HEAVY_MODULES], cwd=directory, env=env,
+                            capture_output=True, text=True, check=True).stdout
+    return json.loads(output.splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Cold-start time of the application')
+    parser.add_argument('--repeat', type=int, default=10)
+    parser.add_argument('--max-ms', type=float, help='exit with an error if create_app() takes longer (median)')
+    args = parser.parse_args()
+
+    # Directorul de lucru este gol: pornirea nu trebuie sa depinda de o baza de date existenta
+    with tempfile.TemporaryDirectory() as directory:
+        results = {}
+        print('%15s %10s %10s  %s' % ('stage', 'median ms', 'max ms', 'heavy modules'))
+        for name, code in STAGES.items():
+            runs = [run_stage(code, directory) for _ in range(args.repeat)]
+            timings = [run['ms'] for run in runs]
+            heavy = sorted({module for run in runs for module in run['heavy']})
+            results[name] = statistics.median(timings)
+            print('%15s %10.1f %10.1f  %s' % (name, results[name], max(timings), ', '.join(heavy) or '-'))
+            if heavy and name != 'first request':
+                print(f'{name}: {", ".join(heavy)} imported at startup')
+                raise SystemExit(1)
+
+    if args.max_ms is not None and results['create_app()'] > args.max_ms:
+        print(f"create_app() took {results['create_app()']:.1f} ms (limit {args.max_ms} ms)")
+        raise SystemExit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,105 @@
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+
+# Numarul maxim de imagini pastrate in cache
+CACHE_SIZE = 128
+
+
+# Cheie calculata din datele diagramei: aceleasi date produc aceeasi imagine
+def chart_key(data):
+    payload = json.dumps(data, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+# Cache LRU pentru imaginile diagramelor de pe dashboard.
+# Fiecare intrare leaga cheia datelor de fisierul PNG deja generat; fisierele eliminate din cache sunt sterse.
+class ChartCache:
+    def __init__(self, size=CACHE_SIZE):
+        self.size = size
+        self._entries = OrderedDict()
+        self._user_keys = {}
+        self._previous = {}
+        self._lock = threading.Lock()
+
+    # Aflare imagine pentru cheia data (None daca diagrama trebuie generata).
+    # Fisierul este verificat pe disc, deoarece poate fi generat sau sters de alt proces (worker).
+    def get(self, user_id, key, image_path):
+        if not os.path.exists(image_path):
+            with self._lock:
+                if self._entries.pop(key, None) is not None:
+                    self._forget(user_id, key)
+            return None
+
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                return image_path
+        self.put(user_id, key, image_path)
+        return image_path
+
+    def put(self, user_id, key, image_path):
+        evicted = []
+        with self._lock:
+            previous = self._previous.pop(user_id, None)
+            if previous is not None and previous != image_path:
+                evicted.append(previous)
+            self._entries[key] = (user_id, image_path)
+            self._entries.move_to_end(key)
+            self._user_keys.setdefault(user_id, set()).add(key)
+            while len(self._entries) > self.size:
+                old_key, (old_user, old_path) = self._entries.popitem(last=False)
+                self._forget(old_user, old_key)
+                evicted.append(old_path)
+        self._remove_files(evicted)
+
+    # Eliminare imagini ale utilizatorului dupa ce datele lui s-au modificat.
+    # Cea mai recenta imagine este pastrata ca imagine anterioara, afisata pana la generarea celei noi.
+    def invalidate(self, user_id):
+        with self._lock:
+            keys = self._user_keys.pop(user_id, set())
+            ordered = [key for key in self._entries if key in keys]
+            removed = [self._entries.pop(key)[1] for key in ordered]
+            if removed:
+                previous = self._previous.get(user_id)
+                if previous is not None and previous != removed[-1]:
+                    removed.insert(0, previous)
+                self._previous[user_id] = removed.pop()
+        self._remove_files(removed)
+
+    # Imaginea anterioara a utilizatorului (None daca nu exista)
+    def previous(self, user_id):
+        with self._lock:
+            image_path = self._previous.get(user_id)
+        if image_path is not None and os.path.exists(image_path):
+            return image_path
+        return None
+
+    def clear(self):
+        with self._lock:
+            removed = [path for user_id, path in self._entries.values()]
+            removed.extend(self._previous.values())
+            self._entries.clear()
+            self._user_keys.clear()
+            self._previous.clear()
+        self._remove_files(removed)
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _forget(self, user_id, key):
+        keys = self._user_keys.get(user_id)
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._user_keys[user_id]
+
+    @staticmethod
+    def _remove_files(paths):
+        for path in paths:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
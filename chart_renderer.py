@@ -0,0 +1,130 @@
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from chart_store import save_figure
+from money import CENTS, format_cents
+
+# Numarul de procese care genereaza diagrame
+RENDER_WORKERS = 2
+
+
+# Valorile unei serii (sume in subunitati) ca vector NumPy int64 de lungime n
+# (completat cu 0 sau trunchiat daca listele difera); sumele raman exacte pana la desenare
+def _series(values, n):
+    import numpy as np
+
+    array = np.zeros(n, dtype=np.int64)
+    values = np.asarray(values[:n], dtype=np.int64)
+    array[:len(values)] = values
+    return array
+
+
+# Colturile barelor unei serii, ca vector NumPy de forma (n, 4, 2)
+def _bar_vertices(left, heights, width):
+    import numpy as np
+
+    right = left + width
+    bottom = np.zeros_like(heights)
+    return np.stack([
+        np.column_stack([left, bottom]),
+        np.column_stack([left, heights]),
+        np.column_stack([right, heights]),
+        np.column_stack([right, bottom]),
+    ], axis=1)
+
+
+# Generare diagrama 2D cu bare pentru cheltuieli (ruleaza intr-un proces separat).
+# Se foloseste direct obiectul Figure (backend Agg), fara starea globala din pyplot.
+# Fiecare serie (buget, prag, cheltuieli) este un singur PolyCollection construit din vectori NumPy,
+# in loc de cate un dreptunghi separat pentru fiecare bara.
+def render_chart(data, image_path):
+    import numpy as np
+    from matplotlib.collections import PolyCollection
+    from matplotlib.figure import Figure
+
+    categories = data['categories']
+    n = len(categories)
+
+    bar_width = 0.2  # Latimea fiecarei bare
+    indices = np.arange(n)
+
+    series = (
+        (_series(data['budgets'], n), 'Budget Value', 'green'),
+        (_series(data['thresholds'], n), 'Threshold Value', 'orange'),
+        (_series([expense[1] for expense in data['expenses']], n), 'Total Expenses', 'red'),
+    )
+
+    fig = Figure()
+    ax = fig.subplots()
+
+    for offset, (values, label, color) in enumerate(series):
+        centers = indices + offset * bar_width
+        # Inaltimea barelor (coordonate ale axei) este in unitati; etichetele sunt formatate din intregi
+        heights = values / CENTS
+        bars = PolyCollection(_bar_vertices(centers - bar_width / 2, heights, bar_width), facecolors=color, label=label)
+        # Axa Y porneste de la 0, ca in cazul ax.bar()
+        bars.sticky_edges.y.append(0)
+        ax.add_collection(bars)
+
+        # Valoarea afisata deasupra fiecarei bare
+        for x, height, value in zip(centers.tolist(), heights.tolist(), values.tolist()):
+            ax.text(x, height, format_cents(value), ha='center', va='bottom')
+
+    ax.autoscale_view()
+    ax.set_xticks(indices)
+    ax.set_xticklabels([category[2] for category in categories])
+    ax.legend()
+
+    # Salvare grafic intr-un fisier de imagine PNG (fisier temporar redenumit la final)
+    return save_figure(fig, image_path)
+
+
+# Serviciu de generare a diagramelor in afara cererii HTTP.
+# Fiecare job intoarce un Future cu calea imaginii; un job aflat deja in lucru pentru
+# acelasi utilizator si aceleasi date este refolosit in loc sa fie trimis din nou.
+class ChartRenderer:
+    def __init__(self, cache, workers=RENDER_WORKERS):
+        self.cache = cache
+        self.workers = workers
+        self._executor = None
+        self._inflight = {}
+        self._lock = threading.Lock()
+
+    # Procesele sunt pornite la prima diagrama generata, nu la pornirea aplicatiei
+    def _get_executor(self):
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(self.workers, mp_context=multiprocessing.get_context('spawn'))
+        return self._executor
+
+    def submit(self, user_id, key, data, image_path):
+        with self._lock:
+            job = self._inflight.get(user_id)
+            if job is not None and job[0] == key:
+                return job[1]
+            try:
+                future = self._get_executor().submit(render_chart, data, image_path)
+            except BrokenProcessPool:
+                # Un proces de lucru s-a oprit neasteptat; se porneste un pool nou
+                self._executor = None
+                future = self._get_executor().submit(render_chart, data, image_path)
+            self._inflight[user_id] = (key, future)
+
+        future.add_done_callback(lambda done: self._finished(user_id, key, done))
+        return future
+
+    # Imaginea generata este adaugata in cache, pentru cererile urmatoare
+    def _finished(self, user_id, key, future):
+        with self._lock:
+            job = self._inflight.get(user_id)
+            if job is not None and job[1] is future:
+                del self._inflight[user_id]
+        if not future.cancelled() and future.exception() is None:
+            self.cache.put(user_id, key, future.result())
+
+    def shutdown(self):
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = None
@@ -0,0 +1,128 @@
+import os
+import tempfile
+import threading
+import time
+
+# Directorul imaginilor generate; separat de imaginile aplicatiei (static/images), care nu sunt sterse niciodata
+CHART_DIR = 'static/charts'
+
+# Imaginile mai vechi de atatea ore sunt sterse
+CHART_MAX_AGE_HOURS = 24
+
+# Dimensiunea maxima a directorului; peste ea sunt sterse cele mai vechi imagini
+CHART_MAX_BYTES = 50 * 1024 * 1024
+
+# Intervalul (secunde) la care ruleaza curatenia in fundal
+JANITOR_INTERVAL = 600
+
+# Fisierele temporare ramase de la o generare intrerupta sunt sterse dupa atatea secunde
+TEMP_MAX_AGE = 600
+
+TEMP_PREFIX = '.tmp_'
+
+
+# Calea imaginii pentru utilizator si cheia datelor: numele se schimba odata cu datele,
+# deci browserul nu afiseaza niciodata o imagine veche din cache-ul lui
+def chart_path(user_id, key, directory=CHART_DIR):
+    return f'{directory}/chart_{user_id}_{key[:16]}.png'
+
+
+# Salvare figura matplotlib intr-un fisier temporar din acelasi director, apoi redenumire (os.replace).
+# Cine citeste fisierul vede fie imaginea completa, fie niciuna, chiar daca doua procese genereaza
+# aceeasi diagrama in acelasi timp.
+def save_figure(fig, image_path):
+    directory = os.path.dirname(image_path) or '.'
+    os.makedirs(directory, exist_ok=True)
+    handle, temp_path = tempfile.mkstemp(prefix=TEMP_PREFIX, suffix='.png', dir=directory)
+    try:
+        with os.fdopen(handle, 'wb') as file:
+            fig.savefig(file, format='png')
+        os.replace(temp_path, image_path)
+    except BaseException:
+        try:
+            os.remove(temp_path)
+        except OSError:
+            pass
+        raise
+    return image_path
+
+
+# Stergere imagini din directorul diagramelor: mai vechi de max_age_hours, apoi cele mai vechi
+# pana cand dimensiunea totala scade sub max_bytes. Intoarce numarul de fisiere sterse si dimensiunea ramasa.
+def sweep(directory=CHART_DIR, max_age_hours=CHART_MAX_AGE_HOURS, max_bytes=CHART_MAX_BYTES):
+    now = time.time()
+    charts = []
+    removed = 0
+    try:
+        entries = list(os.scandir(directory))
+    except FileNotFoundError:
+        return 0, 0
+
+    for entry in entries:
+        if not entry.is_file():
+            continue
+        try:
+            stat = entry.stat()
+        except FileNotFoundError:
+            continue
+        age = now - stat.st_mtime
+        if entry.name.startswith(TEMP_PREFIX):
+            expired = age > TEMP_MAX_AGE
+        elif entry.name.endswith('.png'):
+            expired = age > max_age_hours * 3600
+        else:
+            continue
+        if expired:
+            removed += _remove(entry.path)
+        elif not entry.name.startswith(TEMP_PREFIX):
+            charts.append((stat.st_mtime, stat.st_size, entry.path))
+
+    total = sum(size for mtime, size, path in charts)
+    for mtime, size, path in sorted(charts):
+        if total <= max_bytes:
+            break
+        removed += _remove(path)
+        total -= size
+    return removed, total
+
+
+def _remove(path):
+    try:
+        os.remove(path)
+        return 1
+    except OSError:
+        return 0
+
+
+# Curatenie periodica a directorului diagramelor, pe un fir in fundal (pornit la prima diagrama generata).
+# Fiecare worker poate rula propriul fir: stergerea unui fisier deja sters este ignorata.
+class ChartJanitor:
+    def __init__(self, directory=CHART_DIR, max_age_hours=CHART_MAX_AGE_HOURS, max_bytes=CHART_MAX_BYTES,
+                 interval=JANITOR_INTERVAL):
+        self.directory = directory
+        self.max_age_hours = max_age_hours
+        self.max_bytes = max_bytes
+        self.interval = interval
+        self._thread = None
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+
+    def sweep(self):
+        return sweep(self.directory, self.max_age_hours, self.max_bytes)
+
+    def start(self):
+        with self._lock:
+            if self._thread is None:
+                self._stop = threading.Event()
+                self._thread = threading.Thread(target=self._run, args=(self._stop,), name='chart-janitor', daemon=True)
+                self._thread.start()
+
+    def _run(self, stop):
+        while not stop.wait(self.interval):
+            self.sweep()
+
+    def shutdown(self):
+        with self._lock:
+            if self._thread is not None:
+                self._stop.set()
+                self._thread = None
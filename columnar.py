@@ -0,0 +1,156 @@
+import io
+
+from csv_export import iter_expenses
+from money import MAX_CENTS
+
+# Coloanele exportate, in ordinea din fisierul CSV; suma este in subunitati (int64)
+COLUMNS = ('user_name', 'amount_cents', 'date', 'description', 'category_name')
+
+# Aceleasi cheltuieli ca exportul CSV, cu suma ca intreg (fara conversie la text sau float)
+COLUMNS_QUERY = ('SELECT ?, amount_cents, date, description, category_name '
+                 'FROM expenses WHERE user_id=? AND amount_cents>0 AND date BETWEEN ? AND ? ORDER BY date')
+
+
+# Formatul Parquet este disponibil doar daca pyarrow este instalat (dependinta optionala)
+def parquet_available():
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+# Formatele disponibile la export si import: extensie -> tipul MIME
+def export_formats():
+    formats = {'.csv': 'text/csv', '.npz': 'application/octet-stream'}
+    if parquet_available():
+        formats['.parquet'] = 'application/vnd.apache.parquet'
+    return formats
+
+
+# Cheltuielile din interval ca vectori NumPy: amount_cents int64, date datetime64[D], texte ca unicode
+def fetch_columns(connection, user_id, user_name, start_date, end_date):
+    import numpy as np
+
+    values = {name: [] for name in COLUMNS}
+    for rows in iter_expenses(connection, user_id, user_name, start_date, end_date, query=COLUMNS_QUERY):
+        for name, column in zip(COLUMNS, zip(*rows)):
+            values[name].extend(column)
+
+    return {
+        'user_name': np.array(values['user_name'], dtype=str),
+        'amount_cents': np.array(values['amount_cents'], dtype=np.int64),
+        'date': np.array(values['date'], dtype='datetime64[D]'),
+        'description': np.array(values['description'], dtype=str),
+        'category_name': np.array(values['category_name'], dtype=str),
+    }
+
+
+# Fisierele exportate inainte de trecerea la subunitati au coloana amount (float64); suma este rotunjita la ban
+def _legacy_amount(columns, names):
+    import numpy as np
+
+    if 'amount_cents' not in names and 'amount' in names:
+        amount = np.asarray(columns['amount'], dtype=np.float64)
+        if not np.isfinite(amount).all():
+            raise ValueError('invalid amount')
+        columns['amount_cents'] = np.rint(amount * 100).astype(np.int64)
+    return columns
+
+
+# Arhiva .npz comprimata, cu cate un vector pentru fiecare coloana (citita cu numpy.load, fara pickle)
+def write_npz(columns, file):
+    import numpy as np
+
+    np.savez_compressed(file, **columns)
+
+
+def read_npz(file):
+    import numpy as np
+
+    with np.load(file, allow_pickle=False) as archive:
+        columns = _legacy_amount({name: archive[name] for name in archive.files}, archive.files)
+    missing = [name for name in COLUMNS if name not in columns]
+    if missing:
+        raise ValueError(f"missing columns: {', '.join(missing)}")
+    return _typed(columns)
+
+
+def write_parquet(columns, file):
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    pq.write_table(pa.table({name: columns[name] for name in COLUMNS}), file)
+
+
+def read_parquet(file):
+    import pyarrow.parquet as pq
+
+    names = pq.read_schema(file).names
+    if hasattr(file, 'seek'):
+        file.seek(0)
+    wanted = [name for name in names if name in COLUMNS or name == 'amount']
+    table = pq.read_table(file, columns=wanted)
+    columns = _legacy_amount({name: table.column(name).to_numpy(zero_copy_only=False) for name in wanted}, wanted)
+    missing = [name for name in COLUMNS if name not in columns]
+    if missing:
+        raise ValueError(f"missing columns: {', '.join(missing)}")
+    return _typed(columns)
+
+
+# Conversie la tipurile asteptate (o valoare gresita face intreg fisierul invalid)
+def _typed(columns):
+    import numpy as np
+
+    return {
+        'user_name': columns['user_name'].astype(str),
+        'amount_cents': columns['amount_cents'].astype(np.int64, casting='same_kind'),
+        'date': columns['date'].astype('datetime64[D]'),
+        'description': columns['description'].astype(str),
+        'category_name': columns['category_name'].astype(str),
+    }
+
+
+WRITERS = {'.npz': write_npz, '.parquet': write_parquet}
+READERS = {'.npz': read_npz, '.parquet': read_parquet}
+
+
+# Export intr-un fisier (cale sau obiect file) in formatul dat de extensie; intoarce numarul de randuri
+def write_export(connection, file, extension, user_id, user_name, start_date, end_date):
+    columns = fetch_columns(connection, user_id, user_name, start_date, end_date)
+    WRITERS[extension](columns, file)
+    return len(columns['amount_cents'])
+
+
+# Export in memorie, pentru descarcare directa
+def export_bytes(connection, extension, user_id, user_name, start_date, end_date):
+    buffer = io.BytesIO()
+    write_export(connection, buffer, extension, user_id, user_name, start_date, end_date)
+    buffer.seek(0)
+    return buffer
+
+
+# Randurile pentru import_expenses, construite din vectori (fara parsarea fiecarei valori din text)
+def iter_rows(columns):
+    import numpy as np
+
+    return zip(columns['user_name'].tolist(), columns['amount_cents'].tolist(),
+               np.datetime_as_string(columns['date'], unit='D').tolist(),
+               columns['description'].tolist(), columns['category_name'].tolist())
+
+
+# Validare rand din fisier columnar: tipurile sunt deja verificate la citire, raman doar valorile
+def parse_typed_row(row, user_name):
+    row_user, amount, date, description, category_name = row
+    if row_user != user_name:
+        return None, f'row belongs to user {row_user}'
+    if abs(amount) > MAX_CENTS:
+        return None, f'invalid amount {amount!r}'
+    if amount <= 0:
+        return None, 'amount must be positive'
+    if date == 'NaT':
+        return None, 'invalid date'
+    if not description or not category_name:
+        return None, 'description and category are required'
+
+    return (amount, date, description, category_name), None
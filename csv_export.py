@@ -0,0 +1,86 @@
+import csv
+import io
+import zlib
+
+import db
+from csv_import import CSV_HEADER
+
+# Numarul de randuri citite din cursor (si scrise in raspuns) la un pas
+FETCH_SIZE = 1000
+
+# Nivelul de compresie pentru exporturile .csv.gz
+GZIP_LEVEL = 6
+
+# Interogarea folosita pentru export (cheltuielile utilizatorului dintr-un interval, in ordinea datei);
+# prima coloana este numele utilizatorului, primit ca parametru. Suma (pastrata in subunitati) este scrisa
+# exact, cu doua zecimale, direct de SQLite.
+EXPORT_QUERY = ("SELECT ?, printf('%d.%02d', amount_cents / 100, amount_cents % 100), date, description, category_name "
+                'FROM expenses WHERE user_id=? AND amount_cents>0 AND date BETWEEN ? AND ? ORDER BY date')
+
+
+# Cheltuielile din interval, citite cate FETCH_SIZE randuri o data (fara fetchall)
+# (query poate selecta alte coloane, cu aceiasi parametri, ex. suma in subunitati pentru formatele columnare)
+def iter_expenses(connection, user_id, user_name, start_date, end_date, fetch_size=FETCH_SIZE, query=EXPORT_QUERY):
+    cursor = connection.execute(query, (user_name, user_id, start_date, end_date))
+    try:
+        while True:
+            rows = cursor.fetchmany(fetch_size)
+            if not rows:
+                break
+            yield rows
+    finally:
+        cursor.close()
+
+
+# Transformare loturi de randuri in bucati de fisier CSV (bytes UTF-8), optional comprimate gzip.
+# Memoria folosita depinde doar de marimea unui lot, nu de numarul total de randuri.
+def iter_csv(batches, compress=False, progress=None):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    compressor = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 31) if compress else None
+    count = 0
+
+    def take():
+        chunk = buffer.getvalue().encode('utf-8')
+        buffer.seek(0)
+        buffer.truncate()
+        return compressor.compress(chunk) if compressor else chunk
+
+    writer.writerow(CSV_HEADER)
+    for rows in batches:
+        writer.writerows(rows)
+        count += len(rows)
+        if progress is not None:
+            progress(count)
+        chunk = take()
+        if chunk:
+            yield chunk
+
+    chunk = take()
+    if compressor:
+        chunk += compressor.flush()
+    if chunk:
+        yield chunk
+
+
+# Export pentru un raspuns HTTP in flux: conexiunea este imprumutata din pool pe durata transferului
+# si returnata cand generatorul se termina (sau cand clientul inchide conexiunea)
+def stream_export(user_id, user_name, start_date, end_date, compress=False, fetch_size=FETCH_SIZE):
+    with db.connection() as conn:
+        yield from iter_csv(iter_expenses(conn, user_id, user_name, start_date, end_date, fetch_size), compress)
+
+
+# Export scris intr-un fisier (folosit de joburile in fundal); intoarce numarul de randuri exportate
+def write_export(connection, path, user_id, user_name, start_date, end_date, compress=False, progress=None):
+    count = 0
+
+    def counted(value):
+        nonlocal count
+        count = value
+        if progress is not None:
+            progress(value)
+
+    with open(path, 'wb') as export_file:
+        for chunk in iter_csv(iter_expenses(connection, user_id, user_name, start_date, end_date), compress, counted):
+            export_file.write(chunk)
+    return count
@@ -0,0 +1,149 @@
+import csv
+import io
+import time
+from datetime import datetime
+
+import db
+from money import format_cents, to_cents
+
+# Numarul de randuri validate si inserate impreuna
+BATCH_SIZE = 1000
+
+# Antetul scris de export_csv; daca apare pe primul rand este ignorat
+CSV_HEADER = ['User', 'Amount', 'Date', 'Description', 'Category']
+
+INSERT_EXPENSE = 'INSERT INTO expenses (user_id, amount_cents, date, description, category_name) VALUES (?, ?, ?, ?, ?)'
+
+BUDGET_QUERY = '''
+    SELECT b.budget_amount_cents, COALESCE(t.total_cents, 0)
+    FROM budgets b
+    LEFT JOIN category_totals t ON t.user_id = b.user_id AND t.category_name = b.category_name
+    WHERE b.user_id = ? AND b.category_name = ?
+'''
+
+
+# Citire incrementala a fisierului incarcat: randurile sunt citite pe masura ce sunt procesate,
+# fara a incarca tot fisierul in memorie
+def read_rows(stream):
+    text = io.TextIOWrapper(stream, encoding='utf-8', newline='')
+    return csv.reader(text)
+
+
+# Bugetul si totalul deja cheltuit pentru o categorie (citite o singura data pe import)
+def _load_budget(cursor, user_id, category_name):
+    cursor.execute(BUDGET_QUERY, (user_id, category_name))
+    return cursor.fetchone()
+
+
+# Validare rand: intoarce ((amount_cents, date, description, category_name), None) sau (None, motivul respingerii)
+def _parse_row(row, user_name):
+    if len(row) != 5:
+        return None, f'expected 5 columns, found {len(row)}'
+
+    row_user, amount, date, description, category_name = row
+    if row_user != user_name:
+        return None, f'row belongs to user {row_user}'
+    try:
+        amount = to_cents(amount)
+    except ValueError:
+        return None, f'invalid amount {amount!r}'
+    if amount <= 0:
+        return None, 'amount must be positive'
+    try:
+        date = datetime.strptime(date, '%Y-%m-%d').strftime('%Y-%m-%d')
+    except ValueError:
+        return None, f'invalid date {date!r}'
+    if not description or not category_name:
+        return None, 'description and category are required'
+
+    return (amount, date, description, category_name), None
+
+
+# Randurile valide, cate batch_size o data: liste de (linie, valori); randurile invalide sunt adaugate in rejected
+def _parsed_batches(rows, user_name, parse_row, batch_size, rejected):
+    batch = []
+    for line_number, row in enumerate(rows, start=1):
+        if line_number == 1 and row == CSV_HEADER:
+            continue
+        if not row:
+            continue
+
+        values, reason = parse_row(row, user_name)
+        if values is None:
+            rejected.append((line_number, reason))
+            continue
+
+        batch.append((line_number, values))
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+# Import cheltuieli pentru utilizatorul dat (id si nume) dintr-un sir de randuri CSV.
+# Coloana User din fisier trebuie sa fie numele utilizatorului; randurile sunt salvate cu id-ul lui.
+# Randurile valide sunt inserate cu executemany, cate un lot o data; verificarea bugetului foloseste
+# totaluri tinute in memorie, citite o singura data pentru fiecare categorie in fiecare tranzactie.
+# Implicit tot importul este o singura tranzactie BEGIN IMMEDIATE (ca in add_expense): este fie salvat
+# complet, fie deloc. Cu commit_each_batch=True (joburile in fundal) fiecare lot are propria tranzactie
+# BEGIN IMMEDIATE si reciteste bugetele si totalurile, deci blocarea de scriere este tinuta doar pe durata
+# unui lot, iar cererile altor utilizatori nu asteapta sfarsitul unui import mare.
+# Intoarce un raport cu numarul de randuri importate, randurile respinse (linie, motiv) si durata.
+# Functia progress (optionala) primeste numarul de randuri procesate dupa fiecare lot.
+# parse_row poate fi inlocuita pentru randuri deja convertite (ex. din fisiere .npz / .parquet).
+def import_expenses(connection, user_id, user_name, rows, batch_size=BATCH_SIZE, progress=None, parse_row=None,
+                    commit_each_batch=False):
+    parse_row = parse_row or _parse_row
+    started = time.perf_counter()
+    cursor = connection.cursor()
+
+    budgets = {}
+    imported = 0
+    rejected = []
+
+    def insert(parsed):
+        nonlocal imported
+        batch = []
+        for line_number, (amount, date, description, category_name) in parsed:
+            if category_name not in budgets:
+                budgets[category_name] = _load_budget(cursor, user_id, category_name)
+            budget = budgets[category_name]
+            if budget is None:
+                rejected.append((line_number, f'no budget defined for {category_name}'))
+                continue
+
+            budget_amount, spent = budget
+            if spent + amount > budget_amount:
+                rejected.append((line_number, f'exceeds budget for {category_name} '
+                                              f'(budget {format_cents(budget_amount)}, spent {format_cents(spent)})'))
+                continue
+            budgets[category_name] = (budget_amount, spent + amount)
+            batch.append((user_id, amount, date, description, category_name))
+
+        cursor.executemany(INSERT_EXPENSE, batch)
+        imported += len(batch)
+        if progress is not None:
+            progress(imported + len(rejected))
+
+    batches = _parsed_batches(rows, user_name, parse_row, batch_size, rejected)
+    if commit_each_batch:
+        for parsed in batches:
+            # Alte cereri pot adauga cheltuieli intre loturi: bugetele si totalurile sunt recitite
+            budgets.clear()
+            with db.immediate(connection):
+                insert(parsed)
+    else:
+        with db.immediate(connection):
+            for parsed in batches:
+                insert(parsed)
+
+    # Randurile invalide sunt gasite la citire, cele peste buget la inserarea lotului
+    rejected.sort()
+    seconds = time.perf_counter() - started
+    return {
+        'imported': imported,
+        'rejected': rejected,
+        'seconds': seconds,
+        'rows_per_second': (imported + len(rejected)) / seconds if seconds else 0,
+    }
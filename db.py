@@ -0,0 +1,781 @@
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+from queue import LifoQueue, Empty, Full
+from flask import current_app, g, has_app_context
+
+# Baza de date unica in care se afla toate tabelele aplicatiei
+DATABASE = 'expenses_tracker.db'
+
+# Fisierele de baza de date folosite de versiunile anterioare (cate un fisier pentru fiecare tabel)
+LEGACY_DATABASES = {
+    'users': 'users.db',
+    'categories': 'categories.db',
+    'budgets': 'budgets.db',
+    'expenses': 'database.db',
+}
+
+# Id-ul utilizatorului pentru un rand vechi (fisierele vechi retin numele utilizatorului)
+LEGACY_USER_ID = '(SELECT u.id FROM main.users u WHERE u.user_name = t.user_name)'
+
+# Suma dintr-o coloana REAL veche, in subunitati (bani)
+def _legacy_cents(column):
+    return f'CAST(ROUND(t.{column} * 100) AS INTEGER)'
+
+
+# Coloanele copiate din fisierele vechi in baza de date unica: (coloane in tabelul nou, valori din tabelul vechi)
+LEGACY_COLUMNS = {
+    'users': ('id, user_name, password, email', 'id, user_name, password, email'),
+    'categories': ('id, user_id, category_name', f'id, {LEGACY_USER_ID}, category_name'),
+    'budgets': ('id, user_id, category_name, budget_amount_cents, budget_threshold_percentage',
+                f"id, {LEGACY_USER_ID}, category_name, {_legacy_cents('budget_amount')}, budget_threshold_percentage"),
+    'expenses': ('id, user_id, amount_cents, date, description, category_name',
+                 f"id, {LEGACY_USER_ID}, {_legacy_cents('amount')}, date, description, category_name"),
+}
+
+# Structura tabelelor din baza de date
+SCHEMA = '''
+    CREATE TABLE IF NOT EXISTS users (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        user_name TEXT UNIQUE NOT NULL,
+        password TEXT NOT NULL,
+        email TEXT UNIQUE NOT NULL
+    );
+
+    CREATE TABLE IF NOT EXISTS expenses (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        user_name TEXT,
+        amount REAL,
+        date TEXT,
+        description TEXT NOT NULL,
+        category_name TEXT NOT NULL
+    );
+
+    CREATE TABLE IF NOT EXISTS budgets (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        user_name TEXT,
+        category_name TEXT,
+        budget_amount REAL,
+        budget_threshold_percentage INTEGER
+    );
+
+    CREATE TABLE IF NOT EXISTS categories (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        user_name TEXT,
+        category_name TEXT UNIQUE NOT NULL
+    );
+'''
+
+# Recalculare completa a totalurilor pe categorii din tabelul expenses
+REBUILD_TOTALS = '''
+    INSERT INTO category_totals (user_id, category_name, total_cents, expense_count)
+    SELECT user_id, category_name, COALESCE(SUM(amount_cents), 0), COUNT(*)
+    FROM expenses
+    WHERE user_id IS NOT NULL
+    GROUP BY user_id, category_name;
+'''
+
+# Recalculare completa a totalurilor pe zile (baza rapoartelor zilnice, saptamanale si lunare)
+REBUILD_DAILY_TOTALS = '''
+    INSERT INTO daily_totals (user_id, category_name, date, total_cents, expense_count)
+    SELECT user_id, category_name, date, COALESCE(SUM(amount_cents), 0), COUNT(*)
+    FROM expenses
+    WHERE user_id IS NOT NULL AND date IS NOT NULL
+    GROUP BY user_id, category_name, date;
+'''
+
+# Migrari de schema, aplicate in ordine. PRAGMA user_version retine cate migrari au fost aplicate,
+# astfel incat bazele de date existente primesc doar modificarile care le lipsesc.
+MIGRATIONS = [
+    # 1: tabelele initiale
+    SCHEMA,
+    # 2: indecsi pentru filtrarile dupa utilizator, categorie si interval de date
+    '''
+    CREATE INDEX IF NOT EXISTS idx_expenses_user_category_date ON expenses (user_name, category_name, date, amount);
+    CREATE INDEX IF NOT EXISTS idx_expenses_user_date ON expenses (user_name, date);
+    CREATE INDEX IF NOT EXISTS idx_budgets_user_category ON budgets (user_name, category_name);
+    CREATE INDEX IF NOT EXISTS idx_categories_user ON categories (user_name, category_name);
+    ''',
+    # 3: totaluri cheltuieli pe utilizator si categorie, actualizate de triggere la fiecare scriere
+    '''
+    CREATE TABLE IF NOT EXISTS category_totals (
+        user_name TEXT NOT NULL,
+        category_name TEXT NOT NULL,
+        total REAL NOT NULL DEFAULT 0,
+        expense_count INTEGER NOT NULL DEFAULT 0,
+        PRIMARY KEY (user_name, category_name)
+    );
+
+    CREATE TRIGGER IF NOT EXISTS expenses_totals_insert AFTER INSERT ON expenses
+    BEGIN
+        INSERT INTO category_totals (user_name, category_name, total, expense_count)
+        VALUES (NEW.user_name, NEW.category_name, NEW.amount, 1)
+        ON CONFLICT (user_name, category_name)
+        DO UPDATE SET total = total + excluded.total, expense_count = expense_count + 1;
+    END;
+
+    CREATE TRIGGER IF NOT EXISTS expenses_totals_delete AFTER DELETE ON expenses
+    BEGIN
+        UPDATE category_totals SET total = total - OLD.amount, expense_count = expense_count - 1
+        WHERE user_name = OLD.user_name AND category_name = OLD.category_name;
+        DELETE FROM category_totals
+        WHERE user_name = OLD.user_name AND category_name = OLD.category_name AND expense_count <= 0;
+    END;
+
+    CREATE TRIGGER IF NOT EXISTS expenses_totals_update AFTER UPDATE OF user_name, category_name, amount ON expenses
+    BEGIN
+        UPDATE category_totals SET total = total - OLD.amount, expense_count = expense_count - 1
+        WHERE user_name = OLD.user_name AND category_name = OLD.category_name;
+        DELETE FROM category_totals
+        WHERE user_name = OLD.user_name AND category_name = OLD.category_name AND expense_count <= 0;
+        INSERT INTO category_totals (user_name, category_name, total, expense_count)
+        VALUES (NEW.user_name, NEW.category_name, NEW.amount, 1)
+        ON CONFLICT (user_name, category_name)
+        DO UPDATE SET total = total + excluded.total, expense_count = expense_count + 1;
+    END;
+
+    DELETE FROM category_totals;
+    INSERT INTO category_totals (user_name, category_name, total, expense_count)
+    SELECT user_name, category_name, COALESCE(SUM(amount), 0), COUNT(*)
+    FROM expenses
+    WHERE user_name IS NOT NULL
+    GROUP BY user_name, category_name;
+    ''',
+    # 4: joburi in fundal (importuri si exporturi mari)
+    '''
+    CREATE TABLE IF NOT EXISTS jobs (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        user_name TEXT NOT NULL,
+        kind TEXT NOT NULL,
+        status TEXT NOT NULL DEFAULT 'queued',
+        progress INTEGER NOT NULL DEFAULT 0,
+        message TEXT,
+        file_path TEXT,
+        created_at TEXT NOT NULL DEFAULT (datetime('now')),
+        updated_at TEXT NOT NULL DEFAULT (datetime('now'))
+    );
+    CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs (status, created_at);
+    ''',
+    # 5: totaluri pe utilizator, zi si categorie, actualizate de triggere la fiecare scriere
+    '''
+    CREATE TABLE IF NOT EXISTS daily_totals (
+        user_name TEXT NOT NULL,
+        date TEXT NOT NULL,
+        category_name TEXT NOT NULL,
+        total REAL NOT NULL DEFAULT 0,
+        expense_count INTEGER NOT NULL DEFAULT 0,
+        PRIMARY KEY (user_name, date, category_name)
+    );
+
+    CREATE TRIGGER IF NOT EXISTS expenses_daily_insert AFTER INSERT ON expenses
+    WHEN NEW.user_name IS NOT NULL AND NEW.date IS NOT NULL
+    BEGIN
+        INSERT INTO daily_totals (user_name, date, category_name, total, expense_count)
+        VALUES (NEW.user_name, NEW.date, NEW.category_name, NEW.amount, 1)
+        ON CONFLICT (user_name, date, category_name)
+        DO UPDATE SET total = total + excluded.total, expense_count = expense_count + 1;
+    END;
+
+    CREATE TRIGGER IF NOT EXISTS expenses_daily_delete AFTER DELETE ON expenses
+    BEGIN
+        UPDATE daily_totals SET total = total - OLD.amount, expense_count = expense_count - 1
+        WHERE user_name = OLD.user_name AND date = OLD.date AND category_name = OLD.category_name;
+        DELETE FROM daily_totals
+        WHERE user_name = OLD.user_name AND date = OLD.date AND category_name = OLD.category_name AND expense_count <= 0;
+    END;
+
+    CREATE TRIGGER IF NOT EXISTS expenses_daily_update AFTER UPDATE OF user_name, date, category_name, amount ON expenses
+    BEGIN
+        UPDATE daily_totals SET total = total - OLD.amount, expense_count = expense_count - 1
+        WHERE user_name = OLD.user_name AND date = OLD.date AND category_name = OLD.category_name;
+        DELETE FROM daily_totals
+        WHERE user_name = OLD.user_name AND date = OLD.date AND category_name = OLD.category_name AND expense_count <= 0;
+        INSERT INTO daily_totals (user_name, date, category_name, total, expense_count)
+        SELECT NEW.user_name, NEW.date, NEW.category_name, NEW.amount, 1
+        WHERE NEW.user_name IS NOT NULL AND NEW.date IS NOT NULL
+        ON CONFLICT (user_name, date, category_name)
+        DO UPDATE SET total = total + excluded.total, expense_count = expense_count + 1;
+    END;
+
+    DELETE FROM daily_totals;
+    INSERT INTO daily_totals (user_name, category_name, date, total, expense_count)
+    SELECT user_name, category_name, date, COALESCE(SUM(amount), 0), COUNT(*)
+    FROM expenses
+    WHERE user_name IS NOT NULL AND date IS NOT NULL
+    GROUP BY user_name, category_name, date;
+    ''',
+    # 6: index full-text (FTS5) pe descrierea cheltuielilor, sincronizat cu expenses prin triggere
+    '''
+    CREATE VIRTUAL TABLE IF NOT EXISTS expenses_fts USING fts5(description, content='expenses', content_rowid='id');
+
+    CREATE TRIGGER IF NOT EXISTS expenses_fts_insert AFTER INSERT ON expenses
+    BEGIN
+        INSERT INTO expenses_fts (rowid, description) VALUES (NEW.id, NEW.description);
+    END;
+
+    CREATE TRIGGER IF NOT EXISTS expenses_fts_delete AFTER DELETE ON expenses
+    BEGIN
+        INSERT INTO expenses_fts (expenses_fts, rowid, description) VALUES ('delete', OLD.id, OLD.description);
+    END;
+
+    CREATE TRIGGER IF NOT EXISTS expenses_fts_update AFTER UPDATE OF description ON expenses
+    BEGIN
+        INSERT INTO expenses_fts (expenses_fts, rowid, description) VALUES ('delete', OLD.id, OLD.description);
+        INSERT INTO expenses_fts (rowid, description) VALUES (NEW.id, NEW.description);
+    END;
+
+    INSERT INTO expenses_fts (expenses_fts) VALUES ('rebuild');
+    ''',
+    # 7: cheltuielile, categoriile, bugetele, totalurile si joburile refera utilizatorul prin users.id
+    # (cheie intreaga) in loc sa repete numele; tabelele sunt recreate, id-urile existente sunt pastrate
+    '''
+    CREATE TABLE expenses_new (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        user_id INTEGER REFERENCES users (id),
+        amount REAL,
+        date TEXT,
+        description TEXT NOT NULL,
+        category_name TEXT NOT NULL
+    );
+    INSERT INTO expenses_new (id, user_id, amount, date, description, category_name)
+    SELECT e.id, u.id, e.amount, e.date, e.description, e.category_name
+    FROM expenses e LEFT JOIN users u ON u.user_name = e.user_name;
+    DROP TABLE expenses;
+    ALTER TABLE expenses_new RENAME TO expenses;
+
+    CREATE TABLE budgets_new (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        user_id INTEGER REFERENCES users (id),
+        category_name TEXT,
+        budget_amount REAL,
+        budget_threshold_percentage INTEGER
+    );
+    INSERT INTO budgets_new (id, user_id, category_name, budget_amount, budget_threshold_percentage)
+    SELECT b.id, u.id, b.category_name, b.budget_amount, b.budget_threshold_percentage
+    FROM budgets b LEFT JOIN users u ON u.user_name = b.user_name;
+    DROP TABLE budgets;
+    ALTER TABLE budgets_new RENAME TO budgets;
+
+    CREATE TABLE categories_new (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        user_id INTEGER REFERENCES users (id),
+        category_name TEXT NOT NULL,
+        UNIQUE (user_id, category_name)
+    );
+    INSERT INTO categories_new (id, user_id, category_name)
+    SELECT c.id, u.id, c.category_name
+    FROM categories c LEFT JOIN users u ON u.user_name = c.user_name;
+    DROP TABLE categories;
+    ALTER TABLE categories_new RENAME TO categories;
+
+    CREATE TABLE jobs_new (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        user_id INTEGER NOT NULL REFERENCES users (id),
+        kind TEXT NOT NULL,
+        status TEXT NOT NULL DEFAULT 'queued',
+        progress INTEGER NOT NULL DEFAULT 0,
+        message TEXT,
+        file_path TEXT,
+        created_at TEXT NOT NULL DEFAULT (datetime('now')),
+        updated_at TEXT NOT NULL DEFAULT (datetime('now'))
+    );
+    INSERT INTO jobs_new (id, user_id, kind, status, progress, message, file_path, created_at, updated_at)
+    SELECT j.id, u.id, j.kind, j.status, j.progress, j.message, j.file_path, j.created_at, j.updated_at
+    FROM jobs j JOIN users u ON u.user_name = j.user_name;
+    DROP TABLE jobs;
+    ALTER TABLE jobs_new RENAME TO jobs;
+
+    CREATE INDEX idx_expenses_user_category_date ON expenses (user_id, category_name, date, amount);
+    CREATE INDEX idx_expenses_user_date ON expenses (user_id, date);
+    CREATE INDEX idx_budgets_user_category ON budgets (user_id, category_name);
+    CREATE INDEX idx_jobs_status ON jobs (status, created_at);
+    CREATE INDEX idx_jobs_user ON jobs (user_id);
+
+    DROP TABLE category_totals;
+    CREATE TABLE category_totals (
+        user_id INTEGER NOT NULL,
+        category_name TEXT NOT NULL,
+        total REAL NOT NULL DEFAULT 0,
+        expense_count INTEGER NOT NULL DEFAULT 0,
+        PRIMARY KEY (user_id, category_name)
+    );
+
+    DROP TABLE daily_totals;
+    CREATE TABLE daily_totals (
+        user_id INTEGER NOT NULL,
+        date TEXT NOT NULL,
+        category_name TEXT NOT NULL,
+        total REAL NOT NULL DEFAULT 0,
+        expense_count INTEGER NOT NULL DEFAULT 0,
+        PRIMARY KEY (user_id, date, category_name)
+    );
+
+    CREATE TRIGGER expenses_totals_insert AFTER INSERT ON expenses
+    WHEN NEW.user_id IS NOT NULL
+    BEGIN
+        INSERT INTO category_totals (user_id, category_name, total, expense_count)
+        VALUES (NEW.user_id, NEW.category_name, NEW.amount, 1)
+        ON CONFLICT (user_id, category_name)
+        DO UPDATE SET total = total + excluded.total, expense_count = expense_count + 1;
+    END;
+
+    CREATE TRIGGER expenses_totals_delete AFTER DELETE ON expenses
+    BEGIN
+        UPDATE category_totals SET total = total - OLD.amount, expense_count = expense_count - 1
+        WHERE user_id = OLD.user_id AND category_name = OLD.category_name;
+        DELETE FROM category_totals
+        WHERE user_id = OLD.user_id AND category_name = OLD.category_name AND expense_count <= 0;
+    END;
+
+    CREATE TRIGGER expenses_totals_update AFTER UPDATE OF user_id, category_name, amount ON expenses
+    BEGIN
+        UPDATE category_totals SET total = total - OLD.amount, expense_count = expense_count - 1
+        WHERE user_id = OLD.user_id AND category_name = OLD.category_name;
+        DELETE FROM category_totals
+        WHERE user_id = OLD.user_id AND category_name = OLD.category_name AND expense_count <= 0;
+        INSERT INTO category_totals (user_id, category_name, total, expense_count)
+        SELECT NEW.user_id, NEW.category_name, NEW.amount, 1
+        WHERE NEW.user_id IS NOT NULL
+        ON CONFLICT (user_id, category_name)
+        DO UPDATE SET total = total + excluded.total, expense_count = expense_count + 1;
+    END;
+
+    CREATE TRIGGER expenses_daily_insert AFTER INSERT ON expenses
+    WHEN NEW.user_id IS NOT NULL AND NEW.date IS NOT NULL
+    BEGIN
+        INSERT INTO daily_totals (user_id, date, category_name, total, expense_count)
+        VALUES (NEW.user_id, NEW.date, NEW.category_name, NEW.amount, 1)
+        ON CONFLICT (user_id, date, category_name)
+        DO UPDATE SET total = total + excluded.total, expense_count = expense_count + 1;
+    END;
+
+    CREATE TRIGGER expenses_daily_delete AFTER DELETE ON expenses
+    BEGIN
+        UPDATE daily_totals SET total = total - OLD.amount, expense_count = expense_count - 1
+        WHERE user_id = OLD.user_id AND date = OLD.date AND category_name = OLD.category_name;
+        DELETE FROM daily_totals
+        WHERE user_id = OLD.user_id AND date = OLD.date AND category_name = OLD.category_name AND expense_count <= 0;
+    END;
+
+    CREATE TRIGGER expenses_daily_update AFTER UPDATE OF user_id, date, category_name, amount ON expenses
+    BEGIN
+        UPDATE daily_totals SET total = total - OLD.amount, expense_count = expense_count - 1
+        WHERE user_id = OLD.user_id AND date = OLD.date AND category_name = OLD.category_name;
+        DELETE FROM daily_totals
+        WHERE user_id = OLD.user_id AND date = OLD.date AND category_name = OLD.category_name AND expense_count <= 0;
+        INSERT INTO daily_totals (user_id, date, category_name, total, expense_count)
+        SELECT NEW.user_id, NEW.date, NEW.category_name, NEW.amount, 1
+        WHERE NEW.user_id IS NOT NULL AND NEW.date IS NOT NULL
+        ON CONFLICT (user_id, date, category_name)
+        DO UPDATE SET total = total + excluded.total, expense_count = expense_count + 1;
+    END;
+
+    CREATE TRIGGER expenses_fts_insert AFTER INSERT ON expenses
+    BEGIN
+        INSERT INTO expenses_fts (rowid, description) VALUES (NEW.id, NEW.description);
+    END;
+
+    CREATE TRIGGER expenses_fts_delete AFTER DELETE ON expenses
+    BEGIN
+        INSERT INTO expenses_fts (expenses_fts, rowid, description) VALUES ('delete', OLD.id, OLD.description);
+    END;
+
+    CREATE TRIGGER expenses_fts_update AFTER UPDATE OF description ON expenses
+    BEGIN
+        INSERT INTO expenses_fts (expenses_fts, rowid, description) VALUES ('delete', OLD.id, OLD.description);
+        INSERT INTO expenses_fts (rowid, description) VALUES (NEW.id, NEW.description);
+    END;
+
+    INSERT INTO category_totals (user_id, category_name, total, expense_count)
+    SELECT user_id, category_name, COALESCE(SUM(amount), 0), COUNT(*)
+    FROM expenses
+    WHERE user_id IS NOT NULL
+    GROUP BY user_id, category_name;
+
+    INSERT INTO daily_totals (user_id, category_name, date, total, expense_count)
+    SELECT user_id, category_name, date, COALESCE(SUM(amount), 0), COUNT(*)
+    FROM expenses
+    WHERE user_id IS NOT NULL AND date IS NOT NULL
+    GROUP BY user_id, category_name, date;
+    ''',
+    # 8: notificari (alerte de buget) nelivrate, pentru fiecare utilizator
+    '''
+    CREATE TABLE IF NOT EXISTS notifications (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        user_id INTEGER NOT NULL REFERENCES users(id),
+        category TEXT NOT NULL,
+        message TEXT NOT NULL,
+        created_at TEXT NOT NULL DEFAULT (datetime('now'))
+    );
+    CREATE INDEX IF NOT EXISTS idx_notifications_user ON notifications (user_id, id);
+    ''',
+    # 9: sumele (cheltuieli, bugete, totaluri) sunt pastrate ca numar intreg de subunitati (bani), nu REAL:
+    # adunarile si comparatiile cu bugetul sunt exacte; valorile existente sunt rotunjite la 2 zecimale
+    '''
+    CREATE TABLE expenses_new (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        user_id INTEGER REFERENCES users (id),
+        amount_cents INTEGER,
+        date TEXT,
+        description TEXT NOT NULL,
+        category_name TEXT NOT NULL
+    );
+    INSERT INTO expenses_new (id, user_id, amount_cents, date, description, category_name)
+    SELECT id, user_id, CAST(ROUND(amount * 100) AS INTEGER), date, description, category_name
+    FROM expenses;
+    DROP TABLE expenses;
+    ALTER TABLE expenses_new RENAME TO expenses;
+
+    CREATE TABLE budgets_new (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        user_id INTEGER REFERENCES users (id),
+        category_name TEXT,
+        budget_amount_cents INTEGER,
+        budget_threshold_percentage INTEGER
+    );
+    INSERT INTO budgets_new (id, user_id, category_name, budget_amount_cents, budget_threshold_percentage)
+    SELECT id, user_id, category_name, CAST(ROUND(budget_amount * 100) AS INTEGER), budget_threshold_percentage
+    FROM budgets;
+    DROP TABLE budgets;
+    ALTER TABLE budgets_new RENAME TO budgets;
+
+    CREATE INDEX idx_expenses_user_category_date ON expenses (user_id, category_name, date, amount_cents);
+    CREATE INDEX idx_expenses_user_date ON expenses (user_id, date);
+    CREATE INDEX idx_budgets_user_category ON budgets (user_id, category_name);
+
+    DROP TABLE category_totals;
+    CREATE TABLE category_totals (
+        user_id INTEGER NOT NULL,
+        category_name TEXT NOT NULL,
+        total_cents INTEGER NOT NULL DEFAULT 0,
+        expense_count INTEGER NOT NULL DEFAULT 0,
+        PRIMARY KEY (user_id, category_name)
+    );
+
+    DROP TABLE daily_totals;
+    CREATE TABLE daily_totals (
+        user_id INTEGER NOT NULL,
+        date TEXT NOT NULL,
+        category_name TEXT NOT NULL,
+        total_cents INTEGER NOT NULL DEFAULT 0,
+        expense_count INTEGER NOT NULL DEFAULT 0,
+        PRIMARY KEY (user_id, date, category_name)
+    );
+
+    CREATE TRIGGER expenses_totals_insert AFTER INSERT ON expenses
+    WHEN NEW.user_id IS NOT NULL
+    BEGIN
+        INSERT INTO category_totals (user_id, category_name, total_cents, expense_count)
+        VALUES (NEW.user_id, NEW.category_name, NEW.amount_cents, 1)
+        ON CONFLICT (user_id, category_name)
+        DO UPDATE SET total_cents = total_cents + excluded.total_cents, expense_count = expense_count + 1;
+    END;
+
+    CREATE TRIGGER expenses_totals_delete AFTER DELETE ON expenses
+    BEGIN
+        UPDATE category_totals SET total_cents = total_cents - OLD.amount_cents, expense_count = expense_count - 1
+        WHERE user_id = OLD.user_id AND category_name = OLD.category_name;
+        DELETE FROM category_totals
+        WHERE user_id = OLD.user_id AND category_name = OLD.category_name AND expense_count <= 0;
+    END;
+
+    CREATE TRIGGER expenses_totals_update AFTER UPDATE OF user_id, category_name, amount_cents ON expenses
+    BEGIN
+        UPDATE category_totals SET total_cents = total_cents - OLD.amount_cents, expense_count = expense_count - 1
+        WHERE user_id = OLD.user_id AND category_name = OLD.category_name;
+        DELETE FROM category_totals
+        WHERE user_id = OLD.user_id AND category_name = OLD.category_name AND expense_count <= 0;
+        INSERT INTO category_totals (user_id, category_name, total_cents, expense_count)
+        SELECT NEW.user_id, NEW.category_name, NEW.amount_cents, 1
+        WHERE NEW.user_id IS NOT NULL
+        ON CONFLICT (user_id, category_name)
+        DO UPDATE SET total_cents = total_cents + excluded.total_cents, expense_count = expense_count + 1;
+    END;
+
+    CREATE TRIGGER expenses_daily_insert AFTER INSERT ON expenses
+    WHEN NEW.user_id IS NOT NULL AND NEW.date IS NOT NULL
+    BEGIN
+        INSERT INTO daily_totals (user_id, date, category_name, total_cents, expense_count)
+        VALUES (NEW.user_id, NEW.date, NEW.category_name, NEW.amount_cents, 1)
+        ON CONFLICT (user_id, date, category_name)
+        DO UPDATE SET total_cents = total_cents + excluded.total_cents, expense_count = expense_count + 1;
+    END;
+
+    CREATE TRIGGER expenses_daily_delete AFTER DELETE ON expenses
+    BEGIN
+        UPDATE daily_totals SET total_cents = total_cents - OLD.amount_cents, expense_count = expense_count - 1
+        WHERE user_id = OLD.user_id AND date = OLD.date AND category_name = OLD.category_name;
+        DELETE FROM daily_totals
+        WHERE user_id = OLD.user_id AND date = OLD.date AND category_name = OLD.category_name AND expense_count <= 0;
+    END;
+
+    CREATE TRIGGER expenses_daily_update AFTER UPDATE OF user_id, date, category_name, amount_cents ON expenses
+    BEGIN
+        UPDATE daily_totals SET total_cents = total_cents - OLD.amount_cents, expense_count = expense_count - 1
+        WHERE user_id = OLD.user_id AND date = OLD.date AND category_name = OLD.category_name;
+        DELETE FROM daily_totals
+        WHERE user_id = OLD.user_id AND date = OLD.date AND category_name = OLD.category_name AND expense_count <= 0;
+        INSERT INTO daily_totals (user_id, date, category_name, total_cents, expense_count)
+        SELECT NEW.user_id, NEW.date, NEW.category_name, NEW.amount_cents, 1
+        WHERE NEW.user_id IS NOT NULL AND NEW.date IS NOT NULL
+        ON CONFLICT (user_id, date, category_name)
+        DO UPDATE SET total_cents = total_cents + excluded.total_cents, expense_count = expense_count + 1;
+    END;
+
+    CREATE TRIGGER expenses_fts_insert AFTER INSERT ON expenses
+    BEGIN
+        INSERT INTO expenses_fts (rowid, description) VALUES (NEW.id, NEW.description);
+    END;
+
+    CREATE TRIGGER expenses_fts_delete AFTER DELETE ON expenses
+    BEGIN
+        INSERT INTO expenses_fts (expenses_fts, rowid, description) VALUES ('delete', OLD.id, OLD.description);
+    END;
+
+    CREATE TRIGGER expenses_fts_update AFTER UPDATE OF description ON expenses
+    BEGIN
+        INSERT INTO expenses_fts (expenses_fts, rowid, description) VALUES ('delete', OLD.id, OLD.description);
+        INSERT INTO expenses_fts (rowid, description) VALUES (NEW.id, NEW.description);
+    END;
+    ''' + REBUILD_TOTALS + REBUILD_DAILY_TOTALS,
+    # 10: stergerea notificarilor expirate (dupa created_at) nu mai parcurge tot tabelul
+    '''
+    CREATE INDEX IF NOT EXISTS idx_notifications_created ON notifications (created_at);
+    ''',
+    # 11: paginile de raport sortate dupa suma citesc indexul in ordinea (suma, id), fara sortare temporara
+    '''
+    CREATE INDEX IF NOT EXISTS idx_expenses_user_amount ON expenses (user_id, amount_cents);
+    ''',
+    # 12: idx_categories_user dubla indexul creat de UNIQUE (user_id, category_name) din migrarea 7
+    # (bazele de date care au aplicat deja migrarea 7 il au inca)
+    '''
+    DROP INDEX IF EXISTS idx_categories_user;
+    ''',
+]
+
+# Numarul maxim de conexiuni inactive pastrate pentru fiecare fisier de baza de date
+POOL_SIZE = 8
+
+# Numarul de instructiuni SQL pregatite (prepared statements) pastrate pe fiecare conexiune
+CACHED_STATEMENTS = 256
+
+# Setari aplicate o singura data, la deschiderea fiecarei conexiuni noi
+PRAGMAS = (
+    'PRAGMA journal_mode = WAL',
+    'PRAGMA synchronous = NORMAL',
+    'PRAGMA temp_store = MEMORY',
+    'PRAGMA cache_size = -16000',
+    'PRAGMA mmap_size = 268435456',
+    'PRAGMA busy_timeout = 5000',
+)
+
+
+# Rezerva (pool) de conexiuni de lunga durata catre un fisier de baza de date.
+# Conexiunile sunt imprumutate pe durata unei cereri si apoi returnate, astfel
+# incat cache-ul de pagini si instructiunile pregatite raman "calde" intre cereri.
+class ConnectionPool:
+    def __init__(self, path, size=POOL_SIZE, factory=sqlite3.Connection):
+        self.path = path
+        self.factory = factory
+        self._idle = LifoQueue(maxsize=size)
+
+    def _connect(self):
+        connection = sqlite3.connect(self.path, timeout=5, check_same_thread=False,
+                                     cached_statements=CACHED_STATEMENTS, factory=self.factory)
+        for pragma in PRAGMAS:
+            connection.execute(pragma)
+        return connection
+
+    def acquire(self):
+        try:
+            return self._idle.get_nowait()
+        except Empty:
+            return self._connect()
+
+    def release(self, connection):
+        # Anuleaza orice tranzactie ramasa deschisa, pentru a nu o transmite cererii urmatoare
+        if connection.in_transaction:
+            connection.rollback()
+        try:
+            self._idle.put_nowait(connection)
+        except Full:
+            connection.close()
+
+    def close_all(self):
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except Empty:
+                break
+
+
+# Pool-urile sunt pastrate pe (fisier, clasa conexiunilor): aplicatii diferite din acelasi proces
+# (ex. cu si fara metrics) nu isi imprumuta una alteia conexiunile
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+# Setarile bazei de date: din configurarea aplicatiei curente (DATABASE, DB_POOL_SIZE, DB_CONNECTION_FACTORY)
+# sau valorile implicite in afara unei aplicatii (ex. scripturile din benchmarks)
+def _settings():
+    config = current_app.config if has_app_context() else {}
+    return (config.get('DATABASE', DATABASE), config.get('DB_POOL_SIZE', POOL_SIZE),
+            config.get('DB_CONNECTION_FACTORY', sqlite3.Connection))
+
+
+# Aflare pool pentru fisierul de baza de date dat (creat la prima utilizare)
+def get_pool(path=None):
+    database, size, factory = _settings()
+    path = path or database
+    pool = _pools.get((path, factory))
+    if pool is None:
+        with _pools_lock:
+            pool = _pools.get((path, factory))
+            if pool is None:
+                pool = ConnectionPool(path, size, factory)
+                _pools[(path, factory)] = pool
+    return pool
+
+
+# Conexiune folosita in afara unei cereri (ex. creare tabele, comenzi din linia de comanda)
+@contextmanager
+def connection(path=None):
+    pool = get_pool(path)
+    conn = pool.acquire()
+    try:
+        yield conn
+    finally:
+        pool.release(conn)
+
+
+# Conexiune pentru cererea curenta: aceeasi conexiune este reutilizata pana la finalul cererii
+def get_db(path=None):
+    path = path or current_app.config['DATABASE']
+    if 'db_connections' not in g:
+        g.db_connections = {}
+    borrowed = g.db_connections.get(path)
+    if borrowed is None:
+        pool = get_pool(path)
+        borrowed = g.db_connections[path] = (pool, pool.acquire())
+    return borrowed[1]
+
+
+# Returnare conexiuni in pool la finalul cererii (in pool-ul din care au fost imprumutate)
+def close_db(exception=None):
+    connections = g.pop('db_connections', None)
+    if connections:
+        for pool, conn in connections.values():
+            pool.release(conn)
+
+
+# Inchidere toate conexiunile inactive (ex. inainte de inlocuirea fisierelor de baza de date)
+def close_all():
+    with _pools_lock:
+        for pool in _pools.values():
+            pool.close_all()
+        _pools.clear()
+
+
+# Tranzactie de scriere pornita cu BEGIN IMMEDIATE: blocarea de scriere este obtinuta de la inceput, deci
+# valorile citite in tranzactie (ex. totalul cheltuit si bugetul) nu pot fi modificate de alt scriitor
+# (alt fir sau alt proces) pana la commit. Cititorii nu sunt blocati (WAL); un alt scriitor asteapta
+# cel mult busy_timeout, apoi primeste sqlite3.OperationalError ("database is locked").
+# La iesirea normala din bloc tranzactia este salvata, la o exceptie este anulata.
+@contextmanager
+def immediate(conn):
+    if conn.in_transaction:
+        raise RuntimeError('a transaction is already open on this connection')
+    conn.execute('BEGIN IMMEDIATE')
+    try:
+        yield conn
+    except BaseException:
+        conn.rollback()
+        raise
+    conn.commit()
+
+
+# Creare tabele si aplicare migrari lipsa (poate fi apelata de oricate ori)
+def create_schema(conn):
+    version = conn.execute('PRAGMA user_version').fetchone()[0]
+    for number, script in enumerate(MIGRATIONS[version:], start=version + 1):
+        # Migrarea si noua versiune sunt salvate in aceeasi tranzactie
+        conn.executescript(f'BEGIN; {script}; PRAGMA user_version = {number}; COMMIT;')
+    return conn.execute('PRAGMA user_version').fetchone()[0]
+
+
+# Recalculare totaluri pe categorii si pe zile din tabelul expenses (ex. dupa modificari facute direct in baza de date)
+def rebuild_totals(conn):
+    conn.execute('DELETE FROM category_totals')
+    conn.execute(REBUILD_TOTALS)
+    conn.execute('DELETE FROM daily_totals')
+    conn.execute(REBUILD_DAILY_TOTALS)
+    conn.commit()
+
+
+# Comparare totaluri pastrate cu cele calculate din expenses; intoarce diferentele gasite
+# (cheia este (id utilizator, categorie) pentru category_totals si (id utilizator, categorie, zi) pentru daily_totals)
+def verify_totals(conn):
+    mismatches = _compare_totals(
+        conn.execute('SELECT user_id, category_name, COALESCE(SUM(amount_cents), 0), COUNT(*) FROM expenses '
+                     'WHERE user_id IS NOT NULL GROUP BY user_id, category_name'),
+        conn.execute('SELECT user_id, category_name, total_cents, expense_count FROM category_totals'))
+    mismatches += _compare_totals(
+        conn.execute('SELECT user_id, category_name, date, COALESCE(SUM(amount_cents), 0), COUNT(*) FROM expenses '
+                     'WHERE user_id IS NOT NULL AND date IS NOT NULL GROUP BY user_id, category_name, date'),
+        conn.execute('SELECT user_id, category_name, date, total_cents, expense_count FROM daily_totals'))
+    return mismatches
+
+
+def _compare_totals(expected_rows, stored_rows):
+    expected = {tuple(row[:-2]): tuple(row[-2:]) for row in expected_rows}
+    stored = {tuple(row[:-2]): tuple(row[-2:]) for row in stored_rows}
+
+    mismatches = []
+    for key in sorted(expected.keys() | stored.keys()):
+        expected_total, expected_count = expected.get(key, (0, 0))
+        stored_total, stored_count = stored.get(key, (0, 0))
+        if expected_total != stored_total or expected_count != stored_count:
+            mismatches.append((key, expected.get(key), stored.get(key)))
+    return mismatches
+
+
+# Mutare date din fisierele vechi (users.db, database.db, budgets.db, categories.db) in baza de date unica.
+# Toate fisierele sunt atasate (ATTACH) si copiate intr-o singura tranzactie; id-urile sunt pastrate,
+# deci o rulare repetata nu dubleaza inregistrarile.
+def migrate_legacy(conn, directory='.'):
+    attached = {}
+    for table, file_name in LEGACY_DATABASES.items():
+        path = os.path.join(directory, file_name)
+        if os.path.exists(path):
+            alias = 'legacy_' + table
+            conn.execute('ATTACH DATABASE ? AS ' + alias, (path,))
+            attached[table] = alias
+
+    moved = {}
+    try:
+        for table, alias in attached.items():
+            exists = conn.execute(f"SELECT 1 FROM {alias}.sqlite_master WHERE type = 'table' AND name = ?", (table,)).fetchone()
+            if exists:
+                columns, values = LEGACY_COLUMNS[table]
+                cursor = conn.execute(f'INSERT OR IGNORE INTO main.{table} ({columns}) SELECT {values} FROM {alias}.{table} t')
+                moved[table] = cursor.rowcount
+        conn.commit()
+    except sqlite3.Error:
+        conn.rollback()
+        raise
+    finally:
+        for alias in attached.values():
+            conn.execute('DETACH DATABASE ' + alias)
+
+    return moved
+
+
+# Inregistrare in aplicatia Flask
+# Setarile raman in app.config, deci mai multe aplicatii create in acelasi proces folosesc fiecare baza ei de date
+def init_app(app):
+    app.config.setdefault('DATABASE', DATABASE)
+    app.config.setdefault('DB_POOL_SIZE', POOL_SIZE)
+    # Clasa conexiunilor noi (ex. metrics.TimedConnection, care masoara fiecare interogare)
+    app.config.setdefault('DB_CONNECTION_FACTORY', sqlite3.Connection)
+    app.teardown_appcontext(close_db)
@@ -0,0 +1,117 @@
+import os
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
+
+import db
+
+# Numarul maxim de joburi (importuri/exporturi mari) care ruleaza in acelasi timp
+JOB_WORKERS = 2
+
+# Directorul in care sunt pastrate fisierele incarcate si exporturile generate
+JOB_DIR = 'jobs'
+
+# Joburile (si fisierele lor) mai vechi de atatea ore sunt sterse
+JOB_RETENTION_HOURS = 24
+
+# Un job neterminat dupa atatea ore este considerat intrerupt (de exemplu procesul care il rula a fost oprit)
+JOB_STALE_HOURS = 6
+
+JOB_COLUMNS = 'id, user_id, kind, status, progress, message, file_path, created_at, updated_at'
+
+# Interogarile de curatenie rulate la fiecare job nou (verificate si de query_plans)
+STALE_QUERY = ("UPDATE jobs SET status = 'failed', message = 'Interrupted', updated_at = datetime('now') "
+               "WHERE status IN ('queued', 'running') AND updated_at < datetime('now', ?)")
+EXPIRED_QUERY = ("SELECT id, file_path FROM jobs WHERE created_at < datetime('now', ?) "
+                 "AND status IN ('done', 'failed')")
+
+
+# Coada de joburi in fundal pentru operatiile mari (import si export CSV).
+# Starea fiecarui job este pastrata in tabelul jobs, deci poate fi citita din orice cerere (si din orice worker).
+# Joburile ruleaza in contextul aplicatiei app (baza ei de date si serviciile ei), daca este data.
+class JobQueue:
+    def __init__(self, workers=JOB_WORKERS, directory=JOB_DIR, app=None):
+        self.workers = workers
+        self.directory = directory
+        self.app = app
+        self._executor = None
+        self._progress = {}
+        self._lock = threading.Lock()
+
+    def _get_executor(self):
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(self.workers, thread_name_prefix='job')
+            return self._executor
+
+    # Cale noua (unica) pentru un fisier al unui job
+    def new_file(self, kind, extension):
+        os.makedirs(self.directory, exist_ok=True)
+        return os.path.join(self.directory, f'{kind}_{uuid.uuid4().hex}{extension}')
+
+    # Creare job si programare executie; intoarce id-ul jobului.
+    # func(connection, progress, *args) primeste o conexiune proprie si intoarce mesajul final.
+    def submit(self, connection, user_id, kind, func, *args, file_path=None):
+        self.purge(connection)
+        cursor = connection.execute('INSERT INTO jobs (user_id, kind, file_path) VALUES (?, ?, ?)',
+                                    (user_id, kind, file_path))
+        connection.commit()
+        job_id = cursor.lastrowid
+        self._get_executor().submit(self._run, job_id, func, args)
+        return job_id
+
+    # Progresul jobului in lucru este tinut in memorie: conexiunea jobului poate avea o tranzactie
+    # deschisa (ex. importul), care nu trebuie salvata partial doar pentru a actualiza progresul
+    def _run(self, job_id, func, args):
+        self._progress[job_id] = 0
+
+        def progress(count):
+            self._progress[job_id] = count
+
+        with self._app_context(), db.connection() as conn:
+            _update(conn, job_id, status='running')
+            try:
+                message = func(conn, progress, *args)
+            except Exception as e:
+                conn.rollback()
+                _update(conn, job_id, status='failed', progress=self._progress.pop(job_id, 0), message=str(e))
+            else:
+                _update(conn, job_id, status='done', progress=self._progress.pop(job_id, 0), message=message)
+
+    def _app_context(self):
+        return self.app.app_context() if self.app is not None else nullcontext()
+
+    # Aflare job al utilizatorului (None daca nu exista sau apartine altui utilizator)
+    def get(self, connection, job_id, user_id):
+        row = connection.execute(f'SELECT {JOB_COLUMNS} FROM jobs WHERE id = ? AND user_id = ?',
+                                 (job_id, user_id)).fetchone()
+        if row is None:
+            return None
+        job = dict(zip([column.strip() for column in JOB_COLUMNS.split(',')], row))
+        if job['status'] == 'running':
+            job['progress'] = self._progress.get(job_id, job['progress'])
+        return job
+
+    # Marcare joburi intrerupte si stergere joburi vechi impreuna cu fisierele lor
+    def purge(self, connection, hours=JOB_RETENTION_HOURS):
+        connection.execute(STALE_QUERY, (f'-{JOB_STALE_HOURS} hours',))
+        expired = connection.execute(EXPIRED_QUERY, (f'-{hours} hours',)).fetchall()
+        for job_id, file_path in expired:
+            if file_path and os.path.exists(file_path):
+                os.remove(file_path)
+        connection.executemany('DELETE FROM jobs WHERE id = ?', [(job_id,) for job_id, file_path in expired])
+        connection.commit()
+
+    def shutdown(self):
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False)
+                self._executor = None
+
+
+def _update(connection, job_id, **fields):
+    assignments = ', '.join(f'{name} = ?' for name in fields)
+    connection.execute(f"UPDATE jobs SET {assignments}, updated_at = datetime('now') WHERE id = ?",
+                       (*fields.values(), job_id))
+    connection.commit()
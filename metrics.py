@@ -0,0 +1,237 @@
+import logging
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+
+from flask import current_app, g, has_app_context, has_request_context, request, abort, Response, before_render_template, template_rendered
+
+# Limitele (secunde) histogramelor de durata, ca in clientii Prometheus
+BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Interogarile mai lente de atatea milisecunde sunt scrise in jurnal (None = dezactivat)
+SLOW_QUERY_MS = None
+
+# Fazele unei cereri, in ordinea din antetul Server-Timing
+PHASES = ('db', 'chart', 'template')
+
+slow_query_log = logging.getLogger('expenses.slow_query')
+
+
+# Histograma cu etichete (ex. ruta, faza), in formatul text Prometheus
+class Histogram:
+    def __init__(self, name, help_text, label, buckets=BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.label = label
+        self.buckets = buckets
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, label_value, seconds):
+        with self._lock:
+            series = self._series.get(label_value)
+            if series is None:
+                series = self._series[label_value] = [[0] * len(self.buckets), 0.0, 0]
+            counts = series[0]
+            for index, bound in enumerate(self.buckets):
+                if seconds <= bound:
+                    counts[index] += 1
+            series[1] += seconds
+            series[2] += 1
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.help_text}', f'# TYPE {self.name} histogram']
+        with self._lock:
+            series = sorted((label_value, [list(values[0]), values[1], values[2]])
+                            for label_value, values in self._series.items())
+        for label_value, (counts, total, count) in series:
+            label = f'{self.label}="{label_value}"'
+            for bound, bucket_count in zip(self.buckets, counts):
+                lines.append(f'{self.name}_bucket{{{label},le="{bound}"}} {bucket_count}')
+            lines.append(f'{self.name}_bucket{{{label},le="+Inf"}} {count}')
+            lines.append(f'{self.name}_sum{{{label}}} {total:.6f}')
+            lines.append(f'{self.name}_count{{{label}}} {count}')
+        return lines
+
+
+# Contor crescator, in formatul text Prometheus (incrementat din mai multe fire)
+class Counter:
+    def __init__(self, name, help_text):
+        self.name = name
+        self.help_text = help_text
+        self.value = 0
+        self._lock = threading.Lock()
+
+    def inc(self):
+        with self._lock:
+            self.value += 1
+
+    def render(self):
+        with self._lock:
+            value = self.value
+        return [f'# HELP {self.name} {self.help_text}', f'# TYPE {self.name} counter', f'{self.name} {value}']
+
+
+# Masuratorile unei aplicatii (pastrate in app.extensions['metrics']): aplicatiile create in acelasi
+# proces (ex. in teste) nu isi amesteca valorile
+class Metrics:
+    def __init__(self):
+        self.request_seconds = Histogram('expenses_request_seconds', 'Request duration by endpoint.', 'endpoint')
+        self.phase_seconds = Histogram('expenses_phase_seconds', 'Time spent per phase (db, chart, template).', 'phase')
+        self.slow_queries = Counter('expenses_slow_queries_total', 'Queries slower than SLOW_QUERY_MS.')
+
+    def render(self):
+        return self.request_seconds.render() + self.phase_seconds.render() + self.slow_queries.render()
+
+
+# Masuratorile aplicatiei curente (None in afara unei aplicatii sau daca instrumentarea nu este inregistrata)
+def current_metrics():
+    return current_app.extensions.get('metrics') if has_app_context() else None
+
+
+# Adaugare durata la faza data a cererii curente (si la histograma fazelor a aplicatiei)
+def record(phase, seconds):
+    metrics = current_metrics()
+    if metrics is None:
+        return
+    metrics.phase_seconds.observe(phase, seconds)
+    timings = g.get('timings')
+    if timings is not None:
+        timing = timings.setdefault(phase, [0.0, 0])
+        timing[0] += seconds
+        timing[1] += 1
+
+
+# Instrumentarea este activa pentru aplicatia curenta (METRICS_ENABLED)?
+def enabled():
+    return has_app_context() and current_app.config.get('METRICS_ENABLED', False)
+
+
+# Masurare durata unui bloc de cod ca faza a cererii curente, ex. with metrics.span('chart'): ...
+# Fara METRICS_ENABLED blocul ruleaza nemasurat (nimic nu este adaugat in histograme).
+@contextmanager
+def span(phase):
+    if not enabled():
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        record(phase, time.perf_counter() - started)
+
+
+# Durata unei interogari: faza db (doar cu METRICS_ENABLED) si jurnalul interogarilor mai lente de SLOW_QUERY_MS
+def _record_query(sql, started):
+    seconds = time.perf_counter() - started
+    metrics = current_metrics()
+    if metrics is None:
+        return
+    if current_app.config.get('METRICS_ENABLED', False):
+        record('db', seconds)
+    slow_query_ms = current_app.config.get('SLOW_QUERY_MS')
+    if slow_query_ms is not None and seconds * 1000 >= slow_query_ms:
+        metrics.slow_queries.inc()
+        where = request.endpoint if has_request_context() else 'background'
+        slow_query_log.warning('%.1f ms [%s] %s', seconds * 1000, where, ' '.join(sql.split()))
+
+
+# Cursor si conexiune SQLite care masoara fiecare instructiune (folosite doar cand instrumentarea este activa).
+# Pentru SELECT se masoara executia pana la primul rand (unde SQLite face sortarea / gruparea),
+# nu si citirea randurilor urmatoare cu fetchmany().
+class TimedCursor(sqlite3.Cursor):
+    def execute(self, sql, parameters=()):
+        started = time.perf_counter()
+        try:
+            return super().execute(sql, parameters)
+        finally:
+            _record_query(sql, started)
+
+    def executemany(self, sql, seq_of_parameters):
+        started = time.perf_counter()
+        try:
+            return super().executemany(sql, seq_of_parameters)
+        finally:
+            _record_query(sql, started)
+
+    def executescript(self, sql_script):
+        started = time.perf_counter()
+        try:
+            return super().executescript(sql_script)
+        finally:
+            _record_query(sql_script, started)
+
+
+class TimedConnection(sqlite3.Connection):
+    def cursor(self, factory=TimedCursor):
+        return super().cursor(factory)
+
+    def execute(self, sql, parameters=()):
+        return self.cursor().execute(sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        return self.cursor().executemany(sql, seq_of_parameters)
+
+    def executescript(self, sql_script):
+        return self.cursor().executescript(sql_script)
+
+
+def _start_request():
+    g.timings = {}
+    g.request_started = time.perf_counter()
+
+
+def _finish_request(response):
+    started = g.pop('request_started', None)
+    if started is None:
+        return response
+    total = time.perf_counter() - started
+    current_metrics().request_seconds.observe(request.endpoint or 'not_found', total)
+
+    timings = g.pop('timings', {})
+    entries = []
+    for phase in PHASES:
+        if phase in timings:
+            seconds, count = timings[phase]
+            entries.append(f'{phase};dur={seconds * 1000:.2f};desc="{count}x"')
+    entries.append(f'total;dur={total * 1000:.2f}')
+    response.headers['Server-Timing'] = ', '.join(entries)
+    return response
+
+
+def _template_started(sender, template, context, **extra):
+    g.template_started = time.perf_counter()
+
+
+def _template_finished(sender, template, context, **extra):
+    started = g.pop('template_started', None)
+    if started is not None:
+        record('template', time.perf_counter() - started)
+
+
+# Pagina /metrics: textul Prometheus, doar pentru cereri locale (ex. un agent Prometheus pe acelasi server)
+def metrics_page():
+    if request.remote_addr not in ('127.0.0.1', '::1'):
+        abort(404)
+    lines = current_metrics().render()
+    return Response('\n'.join(lines) + '\n', mimetype='text/plain; version=0.0.4')
+
+
+# Inregistrare in aplicatia Flask. Cand METRICS_ENABLED si SLOW_QUERY_MS lipsesc nu se inregistreaza nimic:
+# conexiunile raman sqlite3.Connection obisnuite si cererile nu trec prin niciun cod suplimentar.
+def init_app(app):
+    slow_query_ms = app.config.get('SLOW_QUERY_MS', SLOW_QUERY_MS)
+    metrics_enabled = app.config.get('METRICS_ENABLED', False)
+    if not metrics_enabled and slow_query_ms is None:
+        return
+
+    app.config['DB_CONNECTION_FACTORY'] = TimedConnection
+    app.extensions['metrics'] = Metrics()
+
+    if metrics_enabled:
+        app.before_request(_start_request)
+        app.after_request(_finish_request)
+        before_render_template.connect(_template_started, app)
+        template_rendered.connect(_template_finished, app)
+        app.add_url_rule('/metrics', 'metrics', metrics_page)
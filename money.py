@@ -0,0 +1,41 @@
+from decimal import Decimal, InvalidOperation, ROUND_HALF_UP
+
+# Sumele sunt pastrate ca numar intreg de subunitati (bani / centi): 12.34 -> 1234.
+# Adunarile si comparatiile cu bugetul sunt exacte, fara erorile de rotunjire ale valorilor float.
+CENTS = 100
+
+# Cea mai mare suma acceptata (in subunitati): incape in INTEGER (SQLite) si in int64 (NumPy)
+MAX_CENTS = 10 ** 15
+
+
+# Conversie suma introdusa (text, int, float sau Decimal) in subunitati, rotunjita la cel mai apropiat ban.
+# Arunca ValueError pentru valori invalide, infinite sau prea mari.
+def to_cents(value):
+    try:
+        amount = Decimal(str(value).strip())
+    except InvalidOperation:
+        raise ValueError(f'invalid amount {value!r}') from None
+    if not amount.is_finite():
+        raise ValueError(f'invalid amount {value!r}')
+    if abs(amount) * CENTS > MAX_CENTS:
+        raise ValueError(f'amount out of range {value!r}')
+    return int((amount * CENTS).quantize(Decimal(1), rounding=ROUND_HALF_UP))
+
+
+# Suma in subunitati ca text cu doua zecimale, ex. 1234 -> '12.34' (filtrul money din sabloane)
+def format_cents(cents):
+    cents = int(cents or 0)
+    sign = '-' if cents < 0 else ''
+    units, rest = divmod(abs(cents), CENTS)
+    return f'{sign}{units}.{rest:02d}'
+
+
+# Suma in unitati, pentru raspunsurile JSON (float, ex. 1234 -> 12.34)
+def to_units(cents):
+    return (cents or 0) / CENTS
+
+
+# Procent dintr-o suma in subunitati (ex. pragul bugetului), rotunjit la cel mai apropiat ban
+def percent_of(cents, percentage):
+    share = Decimal(int(cents)) * Decimal(str(percentage)) / CENTS
+    return int(share.quantize(Decimal(1), rounding=ROUND_HALF_UP))
@@ -0,0 +1,85 @@
+import threading
+import time
+from collections import defaultdict, deque
+
+# Numarul maxim de notificari pastrate pentru un utilizator (cele mai vechi sunt inlocuite)
+NOTIFICATION_LIMIT = 20
+
+# Notificarile nelivrate dupa atatea ore sunt sterse
+NOTIFICATION_TTL_HOURS = 24
+
+
+# Notificari (alerte de buget) pentru fiecare utilizator, pastrate in memoria procesului.
+# Sunt calculate o singura data, la scrierea cheltuielii, si livrate la urmatoarea pagina
+# afisata utilizatorului respectiv (nu altui utilizator si nu in alta cerere oarecare).
+class MemoryNotificationStore:
+    def __init__(self, limit=NOTIFICATION_LIMIT, ttl_hours=NOTIFICATION_TTL_HOURS):
+        self.limit = limit
+        self.ttl = ttl_hours * 3600
+        self._queues = defaultdict(lambda: deque(maxlen=self.limit))
+        self._lock = threading.Lock()
+
+    # Adaugare notificare; connection este ignorata (pastrata pentru aceeasi interfata ca SqliteNotificationStore)
+    def push(self, connection, user_id, message, category='info'):
+        with self._lock:
+            self._queues[user_id].append((time.monotonic(), category, message))
+
+    # Preluare (si stergere) notificari nelivrate si neexpirate; intoarce lista de (categorie, mesaj)
+    def pop(self, connection, user_id):
+        with self._lock:
+            queue = self._queues.pop(user_id, None)
+        if not queue:
+            return []
+        oldest = time.monotonic() - self.ttl
+        return [(category, message) for created, category, message in queue if created >= oldest]
+
+    # Stergere notificari expirate ale tuturor utilizatorilor (ex. utilizatori care nu s-au mai autentificat)
+    def purge(self, connection):
+        oldest = time.monotonic() - self.ttl
+        with self._lock:
+            for user_id in [user_id for user_id, queue in self._queues.items() if queue[-1][0] < oldest]:
+                del self._queues[user_id]
+
+
+# Interogarile SqliteNotificationStore (verificate si de query_plans)
+INSERT_QUERY = 'INSERT INTO notifications (user_id, category, message) VALUES (?, ?, ?)'
+TRIM_QUERY = '''
+    DELETE FROM notifications WHERE user_id = ? AND id NOT IN (
+        SELECT id FROM notifications WHERE user_id = ? ORDER BY id DESC LIMIT ?)
+'''
+POP_QUERY = ("SELECT id, category, message, created_at >= datetime('now', ?) FROM notifications "
+             'WHERE user_id = ? ORDER BY id')
+DELIVERED_QUERY = 'DELETE FROM notifications WHERE user_id = ? AND id <= ?'
+PURGE_QUERY = "DELETE FROM notifications WHERE created_at < datetime('now', ?)"
+
+
+# Aceleasi notificari, pastrate in tabelul notifications: sunt vazute de toate procesele (workerii) serverului
+# si nu se pierd la repornire. push() scrie in tranzactia apelantului (de exemplu impreuna cu cheltuiala),
+# care trebuie salvata (commit) de apelant; pop() salveaza stergerea notificarilor livrate.
+class SqliteNotificationStore:
+    def __init__(self, limit=NOTIFICATION_LIMIT, ttl_hours=NOTIFICATION_TTL_HOURS):
+        self.limit = limit
+        self.ttl_hours = ttl_hours
+
+    def push(self, connection, user_id, message, category='info'):
+        connection.execute(INSERT_QUERY, (user_id, category, message))
+        connection.execute(TRIM_QUERY, (user_id, user_id, self.limit))
+
+    def pop(self, connection, user_id):
+        rows = connection.execute(POP_QUERY, (f'-{self.ttl_hours} hours', user_id)).fetchall()
+        if not rows:
+            return []
+        connection.execute(DELIVERED_QUERY, (user_id, rows[-1][0]))
+        connection.commit()
+        return [(category, message) for notification_id, category, message, fresh in rows if fresh]
+
+    # Stergere notificari expirate ale tuturor utilizatorilor (ex. utilizatori care nu s-au mai autentificat)
+    def purge(self, connection):
+        connection.execute(PURGE_QUERY, (f'-{self.ttl_hours} hours',))
+        connection.commit()
+
+
+STORES = {
+    'memory': MemoryNotificationStore,
+    'sqlite': SqliteNotificationStore,
+}
@@ -0,0 +1,123 @@
+import hashlib
+import hmac
+import os
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+# Algoritmul folosit pentru parolele noi: 'scrypt' sau 'pbkdf2_sha256'
+HASH_METHOD = 'scrypt'
+
+# Costul (factorul de lucru) pentru fiecare algoritm; masurat cu benchmarks/bench_password_hash.py
+SCRYPT_N = 2 ** 14
+SCRYPT_R = 8
+SCRYPT_P = 1
+PBKDF2_ITERATIONS = 600000
+
+SALT_BYTES = 16
+
+# Numarul de fire care calculeaza hash-uri in acelasi timp si cate cereri pot astepta dupa ele
+HASH_WORKERS = 2
+HASH_QUEUE = 16
+
+# Cat asteapta o cerere un loc liber (secunde) inainte de a renunta
+HASH_WAIT = 5.0
+
+# Hash-urile vechi: SHA-256 simplu, fara sare (64 caractere hexazecimale)
+LEGACY_SHA256 = re.compile(r'[0-9a-f]{64}')
+
+
+# Prea multe cereri asteapta calculul unui hash (ex. o rafala de login-uri)
+class HasherBusy(Exception):
+    pass
+
+
+# Calcul hash cu sare aleatoare; rezultatul contine algoritmul si parametrii, deci poate fi verificat
+# si dupa schimbarea costului: scrypt$n$r$p$sare$hash sau pbkdf2_sha256$iteratii$sare$hash
+def hash_password(password, method=HASH_METHOD, scrypt_n=SCRYPT_N, iterations=PBKDF2_ITERATIONS):
+    salt = os.urandom(SALT_BYTES)
+    if method == 'scrypt':
+        digest = _scrypt(password, salt, scrypt_n, SCRYPT_R, SCRYPT_P)
+        return f'scrypt${scrypt_n}${SCRYPT_R}${SCRYPT_P}${salt.hex()}${digest.hex()}'
+    if method == 'pbkdf2_sha256':
+        digest = hashlib.pbkdf2_hmac('sha256', password.encode('utf-8'), salt, iterations)
+        return f'pbkdf2_sha256${iterations}${salt.hex()}${digest.hex()}'
+    raise ValueError(f'unknown password hash method {method!r}')
+
+
+def _scrypt(password, salt, n, r, p):
+    # Memoria necesara este ~128 * n * r * p bytes; limita implicita din OpenSSL (32 MB) este prea mica pentru n mare
+    return hashlib.scrypt(password.encode('utf-8'), salt=salt, n=n, r=r, p=p, dklen=32,
+                          maxmem=256 * n * r * p + 1024 * 1024)
+
+
+# Verificare parola fata de hash-ul salvat (scrypt, pbkdf2 sau SHA-256 vechi)
+def verify_password(password, stored):
+    if LEGACY_SHA256.fullmatch(stored):
+        return hmac.compare_digest(hashlib.sha256(password.encode('utf-8')).hexdigest(), stored)
+
+    parts = stored.split('$')
+    try:
+        if parts[0] == 'scrypt' and len(parts) == 6:
+            n, r, p = int(parts[1]), int(parts[2]), int(parts[3])
+            digest = _scrypt(password, bytes.fromhex(parts[4]), n, r, p)
+            return hmac.compare_digest(digest.hex(), parts[5])
+        if parts[0] == 'pbkdf2_sha256' and len(parts) == 4:
+            digest = hashlib.pbkdf2_hmac('sha256', password.encode('utf-8'), bytes.fromhex(parts[2]), int(parts[1]))
+            return hmac.compare_digest(digest.hex(), parts[3])
+    except ValueError:
+        return False
+    return False
+
+
+# Hash-ul trebuie recalculat daca este vechi (SHA-256) sau a fost calculat cu alt algoritm / alt cost
+def needs_rehash(stored, method=HASH_METHOD, scrypt_n=SCRYPT_N, iterations=PBKDF2_ITERATIONS):
+    parts = stored.split('$')
+    if method == 'scrypt':
+        return parts[:4] != ['scrypt', str(scrypt_n), str(SCRYPT_R), str(SCRYPT_P)]
+    return parts[:2] != ['pbkdf2_sha256', str(iterations)]
+
+
+# Calculul hash-urilor ruleaza pe un numar limitat de fire, nu direct in firul cererii:
+# o rafala de login-uri ocupa cel mult HASH_WORKERS nuclee, iar cererile peste HASH_QUEUE sunt refuzate
+# (HasherBusy) in loc sa blocheze toate firele serverului.
+class PasswordHasher:
+    def __init__(self, method=HASH_METHOD, scrypt_n=SCRYPT_N, iterations=PBKDF2_ITERATIONS,
+                 workers=HASH_WORKERS, queue=HASH_QUEUE, wait=HASH_WAIT):
+        self.method = method
+        self.scrypt_n = scrypt_n
+        self.iterations = iterations
+        self.workers = workers
+        self.wait = wait
+        self._slots = threading.BoundedSemaphore(workers + queue)
+        self._executor = None
+        self._lock = threading.Lock()
+
+    def _get_executor(self):
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(self.workers, thread_name_prefix='hash')
+            return self._executor
+
+    def _run(self, func, *args):
+        if not self._slots.acquire(timeout=self.wait):
+            raise HasherBusy('Too many password checks in progress')
+        try:
+            return self._get_executor().submit(func, *args).result()
+        finally:
+            self._slots.release()
+
+    def hash(self, password):
+        return self._run(hash_password, password, self.method, self.scrypt_n, self.iterations)
+
+    def verify(self, password, stored):
+        return self._run(verify_password, password, stored)
+
+    def needs_rehash(self, stored):
+        return needs_rehash(stored, self.method, self.scrypt_n, self.iterations)
+
+    def shutdown(self):
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False)
+                self._executor = None
@@ -0,0 +1,81 @@
+import re
+
+import columnar
+import csv_export
+import csv_import
+import jobs
+import notifications
+import report_pages
+import rollups
+import search
+
+# Valori de proba pentru parametrii interogarilor (planul nu depinde de valori, doar de forma interogarii)
+USER_ID = 1
+CATEGORIES = ['Food', 'Rent']
+START_DATE, END_DATE = '2024-01-01', '2024-12-31'
+
+# Linia din EXPLAIN QUERY PLAN pentru o citire a tabelului intreg: "SCAN expenses", "SCAN e", "SCAN e USING INDEX ..."
+SCAN = re.compile(r'SCAN (\w+)')
+
+
+# Interogarile frecvente, construite din aceleasi constante si functii pe care le ruleaza aplicatia:
+# nume -> (sql, parametri). Interogarile din app sunt importate la apel (app importa acest modul).
+def hot_queries():
+    import app
+
+    queries = {
+        'chart_data': (app.CHART_DATA_QUERY, (USER_ID,)),
+        'budget': (app.BUDGET_QUERY, (USER_ID, 'Food')),
+        'batch_budgets': (app.batch_budgets_query(len(CATEGORIES)), (USER_ID, *CATEGORIES)),
+        'category_total': (app.CATEGORY_TOTAL_QUERY, (USER_ID, 'Food')),
+        'categories': (app.CATEGORIES_QUERY, (USER_ID,)),
+        'category_names': (app.CATEGORY_NAMES_QUERY, (USER_ID,)),
+        'delete_category_expenses': (app.DELETE_CATEGORY_EXPENSES, (USER_ID, 'Food')),
+        'import_budget': (csv_import.BUDGET_QUERY, (USER_ID, 'Food')),
+        'export_csv': (csv_export.EXPORT_QUERY, ('user', USER_ID, START_DATE, END_DATE)),
+        'export_columnar': (columnar.COLUMNS_QUERY, ('user', USER_ID, START_DATE, END_DATE)),
+        'reports_totals': report_pages.totals_query(USER_ID, CATEGORIES, START_DATE, END_DATE),
+        'notifications_trim': (notifications.TRIM_QUERY, (USER_ID, USER_ID, 20)),
+        'notifications_pop': (notifications.POP_QUERY, ('-24 hours', USER_ID)),
+        'notifications_delivered': (notifications.DELIVERED_QUERY, (USER_ID, 10)),
+        'notifications_purge': (notifications.PURGE_QUERY, ('-24 hours',)),
+        'jobs_stale': (jobs.STALE_QUERY, ('-1 hours',)),
+        'jobs_expired': (jobs.EXPIRED_QUERY, ('-24 hours',)),
+    }
+    for sort in report_pages.SORT_KEYS:
+        for scan_descending in (False, True):
+            suffix = f"{sort}_{'desc' if scan_descending else 'asc'}"
+            cursor = (1000, 10) if sort == 'amount' else ('2024-06-01', 10)
+            queries['reports_first_page_' + suffix] = report_pages.page_query(
+                USER_ID, CATEGORIES, START_DATE, END_DATE, sort, scan_descending)
+            queries['reports_page_' + suffix] = report_pages.page_query(
+                USER_ID, CATEGORIES, START_DATE, END_DATE, sort, scan_descending, cursor=cursor)
+            queries['reports_more_' + suffix] = report_pages.more_query(
+                USER_ID, CATEGORIES, START_DATE, END_DATE, sort, scan_descending, cursor)
+    for period in rollups.PERIODS:
+        queries['rollup_' + period] = rollups.rollup_query(USER_ID, period, START_DATE, END_DATE, CATEGORIES)
+    match = search.fts_query('engie')
+    queries['search_count'] = search.count_query(match, USER_ID, CATEGORIES, START_DATE, END_DATE)
+    queries['search_results'] = search.results_query(match, USER_ID, CATEGORIES, START_DATE, END_DATE)
+    return queries
+
+
+# Citirile complete de tabel din planurile interogarilor: lista de (nume interogare, linia din plan).
+# Sunt acceptate doar tabelele virtuale (FTS5), constantele si subinterogarile deja calculate
+# (CO-ROUTINE / MATERIALIZE), care nu citesc un tabel din baza de date.
+def table_scans(conn, queries=None):
+    if queries is None:
+        queries = hot_queries()
+    scans = []
+    for name, (query, params) in queries.items():
+        plan = conn.execute('EXPLAIN QUERY PLAN ' + query, params).fetchall()
+        subqueries = {row[-1].split()[-1] for row in plan if row[-1].startswith(('CO-ROUTINE', 'MATERIALIZE'))}
+        for row in plan:
+            detail = row[-1]
+            found = SCAN.match(detail)
+            if found is None or 'VIRTUAL TABLE' in detail:
+                continue
+            if found.group(1) == 'CONSTANT' or found.group(1) in subqueries:
+                continue
+            scans.append((name, detail))
+    return scans
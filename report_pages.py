@@ -0,0 +1,117 @@
+from datetime import datetime
+
+# Numarul implicit si maxim de cheltuieli afisate pe o pagina de raport
+PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+
+# Coloanele dupa care poate fi sortat raportul; id-ul cheltuielii departajeaza valorile egale
+SORT_KEYS = {'date': 'date', 'amount': 'amount_cents'}
+
+# Coloanele unui rand din raport (suma in subunitati); numele utilizatorului vine din tabelul users
+REPORT_COLUMNS = 'e.id, u.user_name, e.amount_cents, e.date, e.description, e.category_name'
+
+
+# Conditiile comune pentru pagina, existenta paginii urmatoare si totaluri
+def _filters(user_id, categories, start_date, end_date):
+    placeholders = ','.join(['?'] * len(categories))
+    where = f'user_id = ? AND amount_cents > 0 AND date BETWEEN ? AND ? AND category_name IN ({placeholders})'
+    return where, [user_id, start_date, end_date, *categories]
+
+
+# Cursorul paginii ("valoare:id") din URL; intoarce None daca lipseste sau este invalid
+def parse_cursor(token, sort):
+    if not token:
+        return None
+    value, _, expense_id = token.rpartition(':')
+    try:
+        if sort == 'amount':
+            value = int(value)
+        else:
+            datetime.strptime(value, '%Y-%m-%d')
+        return value, int(expense_id)
+    except ValueError:
+        return None
+
+
+def make_cursor(row, sort):
+    value = row[2] if sort == 'amount' else row[3]
+    return f'{value}:{row[0]}'
+
+
+# Interogarea unei pagini (in sensul citirii: scan_descending) dupa cursorul dat (sau de la inceput)
+def page_query(user_id, categories, start_date, end_date, sort='date', scan_descending=False,
+               page_size=PAGE_SIZE, cursor=None):
+    column = SORT_KEYS[sort]
+    where, params = _filters(user_id, categories, start_date, end_date)
+    direction = 'DESC' if scan_descending else 'ASC'
+    if cursor is not None:
+        where += f" AND ({column}, id) {'<' if scan_descending else '>'} (?, ?)"
+        params.extend(cursor)
+
+    return f'''
+        SELECT {REPORT_COLUMNS}, SUM(e.amount_cents) OVER ()
+        FROM (SELECT * FROM expenses WHERE {where} ORDER BY {column} {direction}, id {direction} LIMIT ?) e
+        JOIN users u ON u.id = e.user_id
+        ORDER BY e.{column} {direction}, e.id {direction}
+    ''', (*params, page_size)
+
+
+# Interogarea care verifica daca exista randuri dupa cursorul dat (in sensul citirii)
+def more_query(user_id, categories, start_date, end_date, sort, scan_descending, cursor):
+    column = SORT_KEYS[sort]
+    where, params = _filters(user_id, categories, start_date, end_date)
+    operator = '<' if scan_descending else '>'
+    return f'SELECT 1 FROM expenses WHERE {where} AND ({column}, id) {operator} (?, ?) LIMIT 1', (*params, *cursor)
+
+
+# O pagina de raport cu paginare keyset pe (cheie de sortare, id): pagina urmatoare continua dupa
+# ultimul rand afisat (after), cea anterioara se citeste in sens invers inainte de primul rand (before).
+# Costul unei pagini nu depinde de pozitia ei in raport (fara OFFSET).
+# Fiecare rand intoarce si totalul paginii, calculat in aceeasi interogare (SUM ... OVER ()).
+def fetch_page(connection, user_id, categories, start_date, end_date, sort='date', descending=False,
+               page_size=PAGE_SIZE, after=None, before=None):
+    backwards = before is not None
+    cursor = before if backwards else after
+    scan_descending = descending != backwards
+
+    rows = connection.execute(*page_query(user_id, categories, start_date, end_date, sort, scan_descending,
+                                          page_size, cursor)).fetchall()
+
+    # Exista randuri dupa ultimul rand citit (in sensul citirii)?
+    more = False
+    if len(rows) == page_size:
+        last = rows[-1]
+        more = connection.execute(*more_query(user_id, categories, start_date, end_date, sort, scan_descending,
+                                              (last[2] if sort == 'amount' else last[3], last[0]))).fetchone() is not None
+
+    if backwards:
+        rows.reverse()
+        has_previous, has_next = more, True
+    else:
+        has_previous, has_next = cursor is not None, more
+
+    return {
+        'expenses': [row[:6] for row in rows],
+        'page_total': rows[0][6] if rows else 0,
+        'previous': make_cursor(rows[0], sort) if rows and has_previous else None,
+        'next': make_cursor(rows[-1], sort) if rows and has_next else None,
+    }
+
+
+# Interogarea totalurilor pe categorii pentru tot raportul
+def totals_query(user_id, categories, start_date, end_date):
+    where, params = _filters(user_id, categories, start_date, end_date)
+    return f'''
+        SELECT category_name, COUNT(*), SUM(amount_cents) FROM expenses WHERE {where}
+        GROUP BY category_name ORDER BY category_name
+    ''', params
+
+
+# Totalurile intregului raport (pe categorii si general), dintr-o singura interogare GROUP BY
+def report_totals(connection, user_id, categories, start_date, end_date):
+    by_category = connection.execute(*totals_query(user_id, categories, start_date, end_date)).fetchall()
+    return {
+        'categories': by_category,
+        'count': sum(row[1] for row in by_category),
+        'total': sum(row[2] for row in by_category),
+    }
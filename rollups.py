@@ -0,0 +1,52 @@
+# Perioadele de agregare: expresia SQL care da prima zi a perioadei pentru coloana date din daily_totals
+# (saptamanile incep lunea)
+PERIODS = {
+    'day': 'date',
+    'week': "date(date, 'weekday 0', '-6 days')",
+    'month': "strftime('%Y-%m-01', date)",
+}
+
+
+def rollup_query(user_id, period, start_date, end_date, categories=None):
+    bucket = PERIODS[period]
+    query = f'''
+        SELECT {bucket} AS bucket, category_name, SUM(total_cents), SUM(expense_count)
+        FROM daily_totals
+        WHERE user_id = ? AND date BETWEEN ? AND ?
+    '''
+    params = [user_id, start_date, end_date]
+    if categories:
+        placeholders = ','.join(['?'] * len(categories))
+        query += f' AND category_name IN ({placeholders})'
+        params.extend(categories)
+    query += ' GROUP BY bucket, category_name ORDER BY bucket, category_name'
+    return query, params
+
+
+# Cheltuieli pe categorie si perioada (zi, saptamana, luna) intr-un interval, din totalurile zilnice
+# mentinute de triggere (daily_totals): interogarea citeste cel mult un rand pe zi si categorie,
+# indiferent de numarul de cheltuieli. Intoarce perioadele in ordine si cate o serie pe categorie (sume in subunitati).
+def fetch_rollup(connection, user_id, period, start_date, end_date, categories=None):
+    query, params = rollup_query(user_id, period, start_date, end_date, categories)
+
+    buckets = []
+    totals = {}
+    counts = {}
+    for bucket_start, category_name, total, count in connection.execute(query, params):
+        if not buckets or buckets[-1] != bucket_start:
+            buckets.append(bucket_start)
+        totals[(bucket_start, category_name)] = total
+        counts[(bucket_start, category_name)] = count
+
+    category_names = sorted({category_name for bucket_start, category_name in totals})
+    return {
+        'period': period,
+        'buckets': buckets,
+        'categories': category_names,
+        'series': {category_name: [totals.get((bucket_start, category_name), 0) for bucket_start in buckets]
+                   for category_name in category_names},
+        'counts': {category_name: [counts.get((bucket_start, category_name), 0) for bucket_start in buckets]
+                   for category_name in category_names},
+        'bucket_totals': [sum(totals.get((bucket_start, category_name), 0) for category_name in category_names)
+                          for bucket_start in buckets],
+    }
@@ -0,0 +1,63 @@
+import re
+
+# Numarul de rezultate afisate pe o pagina de cautare
+PAGE_SIZE = 50
+
+
+# Textul cautat, transformat in interogare FTS5: fiecare cuvant este pus intre ghilimele (fara operatori
+# introdusi de utilizator) si cautat ca prefix, deci "eng" gaseste "Engie". Intoarce None daca nu exista cuvinte.
+def fts_query(text):
+    words = re.findall(r'\w+', text or '')
+    if not words:
+        return None
+    return ' '.join(f'"{word}"*' for word in words)
+
+
+# Conditiile cautarii (text FTS5 deja transformat cu fts_query, categorii si interval optionale)
+def _filters(match, user_id, categories=None, start_date=None, end_date=None):
+    where = 'expenses_fts MATCH ? AND e.user_id = ?'
+    params = [match, user_id]
+    if categories:
+        placeholders = ','.join(['?'] * len(categories))
+        where += f' AND e.category_name IN ({placeholders})'
+        params.extend(categories)
+    if start_date and end_date:
+        where += ' AND e.date BETWEEN ? AND ?'
+        params.extend([start_date, end_date])
+    return where, params
+
+
+def count_query(match, user_id, categories=None, start_date=None, end_date=None):
+    where, params = _filters(match, user_id, categories, start_date, end_date)
+    return f'''
+        SELECT COUNT(*) FROM expenses_fts JOIN expenses e ON e.id = expenses_fts.rowid WHERE {where}
+    ''', params
+
+
+def results_query(match, user_id, categories=None, start_date=None, end_date=None, page=1, page_size=PAGE_SIZE):
+    where, params = _filters(match, user_id, categories, start_date, end_date)
+    return f'''
+        SELECT e.id, u.user_name, e.amount_cents, e.date, e.description, e.category_name
+        FROM expenses_fts JOIN expenses e ON e.id = expenses_fts.rowid JOIN users u ON u.id = e.user_id
+        WHERE {where}
+        ORDER BY expenses_fts.rank, e.date DESC, e.id DESC
+        LIMIT ? OFFSET ?
+    ''', (*params, page_size, (page - 1) * page_size)
+
+
+# Cautare in descrierile cheltuielilor utilizatorului, cu filtrele optionale din rapoarte (categorii, interval).
+# Rezultatele sunt ordonate dupa relevanta (bm25) si paginate; pagina incepe de la 1.
+def search_expenses(connection, user_id, text, categories=None, start_date=None, end_date=None,
+                    page=1, page_size=PAGE_SIZE):
+    match = fts_query(text)
+    if match is None:
+        return {'expenses': [], 'total': 0, 'page': 1, 'pages': 0}
+
+    total = connection.execute(*count_query(match, user_id, categories, start_date, end_date)).fetchone()[0]
+
+    pages = (total + page_size - 1) // page_size
+    page = min(max(page, 1), max(pages, 1))
+    expenses = connection.execute(*results_query(match, user_id, categories, start_date, end_date,
+                                                 page, page_size)).fetchall()
+
+    return {'expenses': expenses, 'total': total, 'page': page, 'pages': pages}
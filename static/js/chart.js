@@ -0,0 +1,102 @@
+// Diagrama 2D cu bare (buget, prag, total cheltuieli) desenata in browser,
+// pe baza datelor JSON intoarse de /api/chart_data
+(function () {
+    var canvas = document.getElementById('expenses-chart');
+    if (!canvas) {
+        return;
+    }
+
+    var series = [
+        {key: 'budgets', label: 'Budget Value', color: 'green'},
+        {key: 'thresholds', label: 'Threshold Value', color: 'orange'},
+        {key: 'expenses', label: 'Total Expenses', color: 'red'}
+    ];
+
+    function formatValue(value) {
+        return (Math.round(value * 100) / 100).toString();
+    }
+
+    function draw(data) {
+        var ctx = canvas.getContext('2d');
+        var width = canvas.width;
+        var height = canvas.height;
+        var margin = {top: 40, right: 20, bottom: 50, left: 60};
+        var plotWidth = width - margin.left - margin.right;
+        var plotHeight = height - margin.top - margin.bottom;
+        var count = data.categories.length;
+
+        var maxValue = 0;
+        series.forEach(function (s) {
+            data[s.key].forEach(function (value) {
+                maxValue = Math.max(maxValue, value);
+            });
+        });
+        if (maxValue <= 0) {
+            maxValue = 1;
+        }
+
+        ctx.clearRect(0, 0, width, height);
+        ctx.font = '11px Arial';
+
+        // Axe si valori pe axa Y
+        ctx.strokeStyle = '#333';
+        ctx.fillStyle = '#333';
+        ctx.beginPath();
+        ctx.moveTo(margin.left, margin.top);
+        ctx.lineTo(margin.left, margin.top + plotHeight);
+        ctx.lineTo(margin.left + plotWidth, margin.top + plotHeight);
+        ctx.stroke();
+
+        ctx.textAlign = 'right';
+        ctx.textBaseline = 'middle';
+        for (var tick = 0; tick <= 5; tick++) {
+            var tickValue = maxValue * tick / 5;
+            var tickY = margin.top + plotHeight - plotHeight * tick / 5;
+            ctx.fillText(formatValue(tickValue), margin.left - 6, tickY);
+        }
+
+        // Cate un grup de trei bare pentru fiecare categorie
+        var groupWidth = plotWidth / Math.max(count, 1);
+        var barWidth = groupWidth * 0.8 / series.length;
+
+        for (var i = 0; i < count; i++) {
+            var groupX = margin.left + i * groupWidth + groupWidth * 0.1;
+
+            series.forEach(function (s, j) {
+                var value = data[s.key][i] || 0;
+                var barHeight = plotHeight * value / maxValue;
+                var x = groupX + j * barWidth;
+                var y = margin.top + plotHeight - barHeight;
+
+                ctx.fillStyle = s.color;
+                ctx.fillRect(x, y, barWidth, barHeight);
+
+                ctx.fillStyle = '#333';
+                ctx.textAlign = 'center';
+                ctx.textBaseline = 'bottom';
+                ctx.fillText(formatValue(value), x + barWidth / 2, y - 2);
+            });
+
+            ctx.textBaseline = 'top';
+            ctx.fillText(data.categories[i], groupX + groupWidth * 0.4, margin.top + plotHeight + 6);
+        }
+
+        // Legenda
+        ctx.textAlign = 'left';
+        ctx.textBaseline = 'middle';
+        series.forEach(function (s, j) {
+            var legendX = margin.left + j * 130;
+            ctx.fillStyle = s.color;
+            ctx.fillRect(legendX, 12, 12, 12);
+            ctx.fillStyle = '#333';
+            ctx.fillText(s.label, legendX + 16, 18);
+        });
+    }
+
+    // Browserul trimite automat If-None-Match; raspunsul 304 refoloseste datele din cache
+    fetch(canvas.dataset.url, {credentials: 'same-origin'})
+        .then(function (response) {
+            return response.json();
+        })
+        .then(draw);
+})();
@@ -0,0 +1,5 @@
+import os
+import sys
+
+# Modulele aplicatiei sunt in radacina depozitului (fara pachet instalat)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,28 @@
+import sqlite3
+
+import pytest
+
+import db
+import query_plans
+
+
+@pytest.fixture
+def conn(tmp_path):
+    connection = sqlite3.connect(tmp_path / 'plans.db')
+    db.create_schema(connection)
+    yield connection
+    connection.close()
+
+
+# Nicio interogare frecventa nu parcurge un tabel intreg (doar tabelul virtual FTS5 este citit cu SCAN)
+def test_hot_queries_use_an_index(conn):
+    assert query_plans.table_scans(conn) == []
+
+
+# Verificarea gaseste citirile complete si pentru tabelele cu alias (ex. SCAN e)
+def test_table_scan_is_reported(conn):
+    conn.execute('DROP INDEX idx_notifications_user')
+    conn.execute('DROP INDEX idx_budgets_user_category')
+    scans = query_plans.table_scans(conn)
+    assert ('notifications_pop', 'SCAN notifications') in scans
+    assert ('budget', 'SCAN b') in scans